@@ -19,12 +19,28 @@ import sys
 import time
 import hashlib
 import argparse
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from io import BytesIO
+from itertools import chain, islice
 from pathlib import Path
-from typing import List, Tuple, Set, Optional
+from typing import Iterable, Iterator, List, Tuple, Set, Optional, Union
 from dotenv import load_dotenv
 import psycopg
 
-import xml.etree.ElementTree as ET
+# raw_text is always written by the stdlib serializer, which also takes lxml
+# elements: the stored text and raw_text_hash don't depend on the backend and
+# match hands imported before lxml (lxml itself writes <x/>, the stdlib <x />)
+from xml.etree.ElementTree import tostring as _xml_tostring
+
+try:
+    from lxml import etree as ET
+    # The stdlib parser drops comments and processing instructions: so must lxml
+    _ITERPARSE_OPTIONS = {"remove_comments": True, "remove_pis": True}
+except ImportError:
+    # stdlib fallback: only portable ElementTree API is used in this module
+    import xml.etree.ElementTree as ET
+    _ITERPARSE_OPTIONS = {}
 
 
 def get_or_create_user(conn, username: str) -> int:
@@ -44,8 +60,8 @@ def get_or_create_user(conn, username: str) -> int:
         return user_id
 
 
-def find_files(path: str, pattern: str, recursive: bool) -> List[Path]:
-    """Find all files matching the pattern in the given path."""
+def find_files(path: str, pattern: str, recursive: bool) -> Iterator[Path]:
+    """Find all files matching the pattern in the given path (lazily, as a generator)."""
     base_path = Path(path)
 
     if not base_path.exists():
@@ -54,39 +70,55 @@ def find_files(path: str, pattern: str, recursive: bool) -> List[Path]:
         raise ValueError(f"Path is not a directory: {path}")
 
     if recursive:
-        return list(base_path.rglob(pattern))
-    return list(base_path.glob(pattern))
+        return base_path.rglob(pattern)
+    return base_path.glob(pattern)
+
 
+READ_CHUNK_SIZE = 64 * 1024
 
-def _read_text_file(file_path: Path) -> str:
+
+def _read_file_bytes(file_path: Path) -> bytes:
+    """Read the file in binary chunks (hands are hashed from these bytes, no re-encode)."""
     try:
-        with open(file_path, "r", encoding="utf-8", errors="replace") as f:
-            return f.read()
+        data = bytearray()
+        with open(file_path, "rb") as f:
+            while chunk := f.read(READ_CHUNK_SIZE):
+                data += chunk
+        return bytes(data)
     except Exception as e:
         raise IOError(f"Error reading file {file_path}: {e}")
 
 
-def parse_hands_from_txt(content: str) -> List[Tuple[str, str]]:
+_HAND_HEADER = re.compile(rb"^GAME\s+#(\d+)", re.MULTILINE)
+
+
+def parse_hands_from_txt(content: bytes) -> Iterator[Tuple[str, str, str]]:
     """
     Parse hands from classic iPoker TXT hand history file.
-    Returns list of (game_id, raw_text).
+    Yields (game_id, raw_text, raw_text_hash), one hand at a time.
     """
-    hands_raw = re.split(r"(?=^GAME\s+#\d+)", content, flags=re.MULTILINE)
-
-    hands: List[Tuple[str, str]] = []
-    for hand_text in hands_raw:
-        hand_text = hand_text.strip()
-        if not hand_text:
+    # Same newline handling as reading the file in text mode
+    content = content.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+
+    # Each hand runs from its GAME # header to the next one (text before the
+    # first header is checked too, in case it is an indented header)
+    bounds = [m.start() for m in _HAND_HEADER.finditer(content)]
+    if not bounds or bounds[0] != 0:
+        bounds.insert(0, 0)
+    bounds.append(len(content))
+
+    for start, end in zip(bounds, bounds[1:]):
+        hand_bytes = content[start:end].strip()
+        if not hand_bytes:
             continue
 
-        match = re.match(r"^GAME\s+#(\d+)", hand_text, re.MULTILINE)
+        match = _HAND_HEADER.match(hand_bytes)
         if not match:
             continue
 
-        game_id = match.group(1)
-        hands.append((game_id, hand_text))
-
-    return hands
+        game_id = match.group(1).decode("ascii")
+        raw_text_hash = hashlib.sha256(hand_bytes).hexdigest()
+        yield game_id, hand_bytes.decode("utf-8", errors="replace"), raw_text_hash
 
 
 def _get_text(node: Optional[ET.Element]) -> str:
@@ -95,76 +127,154 @@ def _get_text(node: Optional[ET.Element]) -> str:
     return node.text.strip()
 
 
-def parse_hands_from_champion_xml(xml_text: str) -> List[Tuple[str, str]]:
+def _wrap_game(game_xml: str, session_attribs: List[str], gamecode: str) -> Tuple[str, str, str]:
+    # Wrap to preserve session metadata per-hand (so parser can be simpler later)
+    # We keep it as XML text stored in hands.raw_text
+    wrapper_attribs = ['source="champion_xml"', *session_attribs, f'gamecode="{gamecode}"']
+
+    raw_hand_xml = f"<hand {' '.join(wrapper_attribs)}>{game_xml}</hand>"
+
+    raw_text_hash = hashlib.sha256(raw_hand_xml.encode("utf-8")).hexdigest()
+    return gamecode, raw_hand_xml, raw_text_hash
+
+
+def parse_hands_from_champion_xml(source: Union[bytes, Path]) -> List[Tuple[str, str, str]]:
     """
     Parse hands from ChampionPoker/iPoker XML 'session' format.
     Each <game gamecode="..."> is a hand.
-    Returns list of (game_id, raw_xml_hand_text).
+    Returns list of (game_id, raw_xml_hand_text, raw_text_hash).
+
+    source is the XML bytes or the file path. The session is read with iterparse and
+    each <game> is dropped from the tree once serialized, so big sessions never
+    hold the whole tree in memory. Games seen before the session's <general> are
+    kept as text and wrapped once it is parsed (or at the end of the session).
     """
+    if isinstance(source, bytes):
+        source = BytesIO(source)
+
+    # Expected: <session sessioncode="..."> ... <game gamecode="..."> ... </game> ... </session>
+    root = None
+    depth = 0
+    sessioncode = ""
+    session_general = None
+    pending_game = None  # serialized once its tail (whitespace up to the next tag) is parsed
+    unwrapped_games: List[Tuple[str, str]] = []  # (gamecode, game_xml) before <general>
+
+    hands: List[Tuple[str, str, str]] = []
+
+    def session_attribs() -> List[str]:
+        # Session-level general metadata (optional but useful)
+        general = {}
+        if session_general is not None:
+            general = {
+                tag: _get_text(session_general.find(tag))
+                for tag in ("nickname", "tablename", "tournamentcode", "tournamentname", "startdate")
+            }
+        attribs = [f'sessioncode="{sessioncode}"' if sessioncode else ""]
+        attribs += [f'{tag}="{value}"' for tag, value in general.items() if value]
+        return [a for a in attribs if a]
+
+    def flush_game():
+        nonlocal pending_game
+        gamecode = (pending_game.attrib.get("gamecode") or "").strip()
+        if gamecode:
+            game_xml = _xml_tostring(pending_game, encoding="unicode")
+            if session_general is None:
+                unwrapped_games.append((gamecode, game_xml))
+            else:
+                hands.append(_wrap_game(game_xml, session_attribs(), gamecode))
+        root.remove(pending_game)
+        pending_game = None
+
+    def wrap_unwrapped_games():
+        attribs = session_attribs()
+        hands.extend(_wrap_game(game_xml, attribs, gamecode) for gamecode, game_xml in unwrapped_games)
+        unwrapped_games.clear()
+
     try:
-        root = ET.fromstring(xml_text)
+        for event, elem in ET.iterparse(source, events=("start", "end"), **_ITERPARSE_OPTIONS):
+            if event == "start":
+                depth += 1
+                if root is None:
+                    root = elem
+                    if root.tag.lower() != "session":
+                        return []
+                    sessioncode = root.attrib.get("sessioncode", "").strip()
+                elif depth == 2 and pending_game is not None:
+                    flush_game()
+                continue
+
+            depth -= 1
+            if depth == 0 and pending_game is not None:
+                flush_game()
+            elif depth == 1:
+                if elem.tag == "general" and session_general is None:
+                    session_general = elem
+                    wrap_unwrapped_games()
+                elif elem.tag == "game":
+                    pending_game = elem
     except Exception:
         # Not valid XML (or not this format)
         return []
 
-    # Expected: <session sessioncode="..."> ... <game gamecode="..."> ... </game> ... </session>
-    if root.tag.lower() != "session":
-        return []
-
-    sessioncode = root.attrib.get("sessioncode", "").strip()
-
-    # Session-level general metadata (optional but useful)
-    session_general = root.find("general")
-    nickname = _get_text(session_general.find("nickname")) if session_general is not None else ""
-    tablename = _get_text(session_general.find("tablename")) if session_general is not None else ""
-    tournamentcode = _get_text(session_general.find("tournamentcode")) if session_general is not None else ""
-    tournamentname = _get_text(session_general.find("tournamentname")) if session_general is not None else ""
-    startdate = _get_text(session_general.find("startdate")) if session_general is not None else ""
-
-    hands: List[Tuple[str, str]] = []
-
-    for game in root.findall("game"):
-        gamecode = (game.attrib.get("gamecode") or "").strip()
-        if not gamecode:
-            continue
-
-        # Wrap to preserve session metadata per-hand (so parser can be simpler later)
-        # We keep it as XML text stored in hands.raw_text
-        wrapper_attribs = [
-            'source="champion_xml"',
-            f'sessioncode="{sessioncode}"' if sessioncode else "",
-            f'nickname="{nickname}"' if nickname else "",
-            f'tablename="{tablename}"' if tablename else "",
-            f'tournamentcode="{tournamentcode}"' if tournamentcode else "",
-            f'tournamentname="{tournamentname}"' if tournamentname else "",
-            f'startdate="{startdate}"' if startdate else "",
-            f'gamecode="{gamecode}"',
-        ]
-        wrapper_attribs = [a for a in wrapper_attribs if a]
-
-        game_xml = ET.tostring(game, encoding="unicode")
-        raw_hand_xml = f"<hand {' '.join(wrapper_attribs)}>{game_xml}</hand>"
-
-        hands.append((gamecode, raw_hand_xml))
-
+    # No <general> in the session: the games keep only the session code
+    wrap_unwrapped_games()
     return hands
 
 
-def parse_hands_from_file(file_path: Path) -> List[Tuple[str, str]]:
+def parse_hands_from_file(file_path: Path) -> List[Tuple[str, str, str]]:
     """
     Parse hands from a file (TXT classic or ChampionPoker XML session).
-    Returns list of (game_id, raw_text).
+    Returns list of (game_id, raw_text, raw_text_hash).
     """
-    content = _read_text_file(file_path)
+    # .xml sessions are streamed from disk, the file is only read whole for the TXT fallback
+    if file_path.suffix.lower() == ".xml":
+        hands_xml = parse_hands_from_champion_xml(file_path)
+        if hands_xml:
+            return hands_xml
+
+    content = _read_file_bytes(file_path)
 
-    # Heuristic: if it looks like XML or is .xml, try XML parser first
-    if file_path.suffix.lower() == ".xml" or content.lstrip().startswith("<"):
+    # Heuristic: if it looks like XML, try XML parser first
+    if file_path.suffix.lower() != ".xml" and content.lstrip().startswith(b"<"):
         hands_xml = parse_hands_from_champion_xml(content)
         if hands_xml:
             return hands_xml
 
     # Fallback: classic TXT
-    return parse_hands_from_txt(content)
+    return list(parse_hands_from_txt(content))
+
+
+def _read_parse_hash(file_path: Path) -> Tuple[Path, List[Tuple[str, str, str]], Optional[str]]:
+    """
+    Process pool worker: read + parse + hash one file.
+    Returns (file_path, hands, error) so one bad file doesn't stop the map.
+    """
+    try:
+        return file_path, parse_hands_from_file(file_path), None
+    except Exception as e:
+        return file_path, [], str(e)
+
+
+def _iter_parsed_files(files: Iterable[Path], executor, workers: int):
+    """
+    Map _read_parse_hash over the files. With a pool, files are submitted a few
+    chunks at a time so parsed hands don't pile up ahead of the database writer.
+    """
+    if executor is None:
+        yield from map(_read_parse_hash, files)
+        return
+
+    files = iter(files)
+    while chunk := list(islice(files, workers * 32)):
+        yield from executor.map(_read_parse_hash, chunk, chunksize=8)
+
+
+def _parse_executor(workers: int):
+    """ProcessPoolExecutor for workers > 1, otherwise parse in this process."""
+    if workers > 1:
+        return ProcessPoolExecutor(max_workers=workers)
+    return nullcontext()
 
 
 def get_existing_game_ids(conn, user_id: int, game_ids: List[str]) -> Set[str]:
@@ -188,10 +298,12 @@ def insert_hands_batch(conn, user_id: int, batch: List[dict]) -> Tuple[int, int]
     if not batch:
         return 0, 0
 
-    game_ids = [h["game_id"] for h in batch]
-    existing_game_ids = get_existing_game_ids(conn, user_id, game_ids)
+    # One row per game_id (the last copy wins, as the UPSERT did row by row)
+    unique_hands = {h["game_id"]: h for h in batch}
+    existing_game_ids = get_existing_game_ids(conn, user_id, list(unique_hands))
 
-    duplicates = sum(1 for h in batch if h["game_id"] in existing_game_ids)
+    # Repeats within the batch count as duplicates too
+    duplicates = len(existing_game_ids) + len(batch) - len(unique_hands)
     inserted = len(batch) - duplicates
 
     data = [
@@ -202,7 +314,7 @@ def insert_hands_batch(conn, user_id: int, batch: List[dict]) -> Tuple[int, int]
             h["raw_text_hash"],
             h["raw_text"],
         )
-        for h in batch
+        for h in unique_hands.values()
     ]
 
     with conn.cursor() as cur:
@@ -217,9 +329,15 @@ def insert_hands_batch(conn, user_id: int, batch: List[dict]) -> Tuple[int, int]
                 source_file = EXCLUDED.source_file
             """,
             data,
+            returning=False,
         )
 
+    del data, unique_hands
     conn.commit()
+
+    # Release the (possibly big) raw_text payloads once they are committed;
+    # on failure the caller still sees the batch to count the lost hands
+    batch.clear()
     return inserted, duplicates
 
 
@@ -230,6 +348,7 @@ def import_folder(
     recursive: bool,
     glob_pattern: str,
     batch_size: int,
+    workers: int = 1,
 ):
     """Main import function."""
     start_time = time.time()
@@ -240,23 +359,32 @@ def import_folder(
     duplicates_total = 0
     errors_total = 0
 
-    with psycopg.connect(database_url) as conn:
+    # prepare_threshold=1: the per-batch SELECT / INSERT are prepared once and reused
+    with psycopg.connect(database_url, prepare_threshold=1) as conn:
         user_id = get_or_create_user(conn, username)
         files = find_files(folder_path, glob_pattern, recursive)
 
-        if not files:
+        first_file = next(files, None)
+        if first_file is None:
             print(f"No files found matching pattern '{glob_pattern}' in {folder_path}")
             return
 
-        print(f"Found {len(files)} file(s) to process...\n")
+        files = chain([first_file], files)
+        print(f"Processing files matching '{glob_pattern}' in {folder_path}...\n")
 
         batch: List[dict] = []
 
-        for file_path in files:
-            try:
+        # Read/parse/hash is pure CPU and independent per file: fan it out to
+        # worker processes, this process only writes to the database
+        with _parse_executor(workers) as executor:
+            for file_path, hands, error in _iter_parsed_files(files, executor, workers):
                 print(f"Processing: {file_path}")
 
-                hands = parse_hands_from_file(file_path)
+                if error is not None:
+                    print(f"  Error processing file: {error}")
+                    errors_total += 1
+                    files_processed += 1
+                    continue
 
                 if not hands:
                     print("  No hands found in file")
@@ -266,10 +394,8 @@ def import_folder(
                 print(f"  Found {len(hands)} hand(s)")
                 hands_total += len(hands)
 
-                for game_id, raw_text in hands:
+                for game_id, raw_text, raw_text_hash in hands:
                     try:
-                        raw_text_hash = hashlib.sha256(raw_text.encode("utf-8")).hexdigest()
-
                         batch.append(
                             {
                                 "game_id": str(game_id),
@@ -292,11 +418,6 @@ def import_folder(
 
                 files_processed += 1
 
-            except Exception as e:
-                print(f"  Error processing file: {e}")
-                errors_total += 1
-                files_processed += 1
-
         if batch:
             try:
                 inserted, duplicates = insert_hands_batch(conn, user_id, batch)
@@ -333,7 +454,13 @@ def main():
         help="Search for files recursively (default: True)",
     )
     parser.add_argument("--glob", default="*.txt", help="File pattern to match (default: *.txt)")
-    parser.add_argument("--batch-size", type=int, default=1000, help="Batch size (default: 1000)")
+    parser.add_argument("--batch-size", type=int, default=200, help="Batch size (default: 200)")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Processes used to read/parse files (default: CPU count, 1 = no pool)",
+    )
 
     args = parser.parse_args()
 
@@ -353,6 +480,7 @@ def main():
             recursive=args.recursive,
             glob_pattern=args.glob,
             batch_size=args.batch_size,
+            workers=args.workers,
         )
     except Exception as e:
         print(f"\nFATAL ERROR: {e}")
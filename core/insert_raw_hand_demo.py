@@ -3,6 +3,7 @@
 
 import os
 import re
+import mmap
 import hashlib
 from pathlib import Path
 from dotenv import load_dotenv
@@ -11,6 +12,10 @@ import psycopg
 # Load environment variables
 load_dotenv()
 
+# Compiled once at import (not per file / per hand)
+_GAME_HDR_RE_B = re.compile(rb'^GAME\s+#\d+', re.MULTILINE)
+_GAME_ID_RE = re.compile(r'^GAME\s+#(\d+)')
+
 def get_or_create_user(conn, username):
     """Get or create a user by username. Returns user_id."""
     with conn.cursor() as cur:
@@ -27,10 +32,16 @@ def get_or_create_user(conn, username):
         )
         return cur.fetchone()[0]
 
-def upsert_hand(conn, user_id, game_id, raw_text, source_file):
-    """Insert or update a hand record. Returns hand id."""
-    # Calculate hash of raw text
-    raw_text_hash = hashlib.sha256(raw_text.encode('utf-8')).hexdigest()
+def upsert_hand(conn, user_id, game_id, raw_text, source_file, raw_bytes=None):
+    """Insert or update a hand record. Returns hand id.
+
+    raw_bytes: the hand as read from the file (see parse_hands_from_file); when
+    given it is hashed directly instead of re-encoding raw_text.
+    """
+    if raw_bytes is None:
+        raw_bytes = raw_text.encode('utf-8')
+    # Calculate hash of raw text (SHA-256, like every other writer of hands.raw_text_hash)
+    raw_text_hash = hashlib.sha256(raw_bytes).hexdigest()
     
     with conn.cursor() as cur:
         # UPSERT using ON CONFLICT
@@ -48,27 +59,35 @@ def upsert_hand(conn, user_id, game_id, raw_text, source_file):
         return cur.fetchone()[0]
 
 def parse_hands_from_file(file_path):
-    """Parse hands from iPoker hand history file."""
-    with open(file_path, "r", encoding="utf-8", errors="replace") as f:
-        content = f.read()
-    
-    # Split by GAME # pattern
-    pattern = re.compile(r'^GAME\s+#\d+', re.MULTILINE)
-    matches = list(pattern.finditer(content))
-    
-    hands = []
-    for i, match in enumerate(matches):
-        start = match.start()
-        end = matches[i + 1].start() if i + 1 < len(matches) else len(content)
-        hand_text = content[start:end].strip()
-        if hand_text:
-            hands.append(hand_text)
+    """Parse hands from iPoker hand history file.
+
+    Returns list of (hand_bytes, hand_text): the bytes are kept for hashing,
+    the text is what gets stored in hands.raw_text.
+    """
+    with open(file_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return []
+        # mmap: the regex scans the file pages directly, nothing is decoded
+        # (or even loaded into memory) except the hand slices we keep
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as content:
+            # Split by GAME # pattern
+            matches = list(_GAME_HDR_RE_B.finditer(content))
+            
+            hands = []
+            for i, match in enumerate(matches):
+                start = match.start()
+                end = matches[i + 1].start() if i + 1 < len(matches) else len(content)
+                hand_bytes = content[start:end].strip()
+                if hand_bytes:
+                    # same newlines as the former text-mode read
+                    hand_bytes = hand_bytes.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+                    hands.append((hand_bytes, hand_bytes.decode("utf-8", errors="replace")))
     
     return hands
 
 def extract_game_id(hand_text):
     """Extract game_id from hand text."""
-    match = re.match(r'^GAME\s+#(\d+)', hand_text)
+    match = _GAME_ID_RE.match(hand_text)
     if match:
         return match.group(1)
     return None
@@ -96,7 +115,7 @@ def main():
         return
     
     # Get first hand
-    first_hand = hands[0]
+    first_hand_bytes, first_hand = hands[0]
     game_id = extract_game_id(first_hand)
     
     if not game_id:
@@ -114,7 +133,8 @@ def main():
             user_id=user_id,
             game_id=game_id,
             raw_text=first_hand,
-            source_file=os.path.basename(file_path)
+            source_file=os.path.basename(file_path),
+            raw_bytes=first_hand_bytes
         )
         
         conn.commit()
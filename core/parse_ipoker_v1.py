@@ -19,13 +19,24 @@ Tables populated:
 import os
 import sys
 import argparse
-import xml.etree.ElementTree as ET
+import threading
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from io import BytesIO
 from decimal import Decimal, InvalidOperation
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple, Union
 
 from dotenv import load_dotenv
 import psycopg
 
+try:
+    from lxml import etree as ET
+    HAVE_LXML = True
+except ImportError:
+    # stdlib fallback: same API for what we use, minus recover / tag= / getparent
+    import xml.etree.ElementTree as ET
+    HAVE_LXML = False
+
 
 # --- Helpers -----------------------------------------------------------------
 
@@ -43,6 +54,25 @@ def parse_decimal(value: Optional[str]) -> Optional[Decimal]:
         return None
 
 
+Amount = Union[int, Decimal]
+
+
+def parse_amount(value: Optional[str]) -> Amount:
+    """
+    Chip amount of an XML attribute (chips/bet/win/sum); missing or invalid -> 0.
+    iPoker amounts are almost always plain integers: those skip Decimal entirely,
+    anything else ("1,235", "0.50") goes through parse_decimal.
+    """
+    if not value:
+        return 0
+    if value.isdecimal():
+        return int(value)
+    s = value.strip()
+    if s.isdecimal() or (s[:1] == "-" and s[1:].isdecimal()):
+        return int(s)
+    return parse_decimal(s) or 0
+
+
 def get_user_id(conn, username: str) -> int:
     with conn.cursor() as cur:
         cur.execute("SELECT id FROM users WHERE username = %s", (username,))
@@ -68,7 +98,16 @@ ACTION_TYPE_MAP = {
 }
 
 
+# Same maps keyed by the attribute text as it appears in the XML ("3", "23", ...):
+# the common case is one dict hit, no str()/strip()/int() per action
+_ACTION_TYPE_BY_STR = {str(k): v for k, v in ACTION_TYPE_MAP.items()}
+_STREET_BY_STR = {"0": "preflop", "1": "preflop", "2": "flop", "3": "turn", "4": "river"}
+
+
 def map_action_type(type_code: Optional[str]) -> str:
+    atype = _ACTION_TYPE_BY_STR.get(type_code)
+    if atype is not None:
+        return atype
     try:
         n = int(str(type_code).strip())
     except Exception:
@@ -79,6 +118,9 @@ def map_action_type(type_code: Optional[str]) -> str:
 def street_from_round_no(round_no: Optional[str]) -> str:
     # Your rule: preflop is round no="1"; flop=2; turn=3; river=4.
     # There is also round no="0" for blinds/antes -> treat as preflop.
+    street = _STREET_BY_STR.get(round_no)
+    if street is not None:
+        return street
     try:
         n = int(str(round_no).strip())
     except Exception:
@@ -96,6 +138,27 @@ def street_from_round_no(round_no: Optional[str]) -> str:
 
 # --- XML Extraction -----------------------------------------------------------
 
+# lxml parsers are not thread-safe: one of each kind per thread, reused
+_LOCAL = threading.local()
+
+
+def _xml_parser(recover: bool = False) -> ET.XMLParser:
+    """
+    Parser for raw_text encoded as UTF-8. raw_text is already decoded, so an
+    encoding="..." declaration inside it must not be honoured (it would turn
+    "José" into "JosÃ©"). recover only applies to lxml; stdlib parsers are
+    single-use, so a new one is returned each time.
+    """
+    if not HAVE_LXML:
+        return ET.XMLParser(encoding="utf-8")
+    attr = "recover_parser" if recover else "parser"
+    parser = getattr(_LOCAL, attr, None)
+    if parser is None:
+        parser = ET.XMLParser(encoding="utf-8", recover=recover, huge_tree=False)
+        setattr(_LOCAL, attr, parser)
+    return parser
+
+
 def extract_game_from_raw_xml(raw_text: str) -> Tuple[ET.Element, ET.Element]:
     """
     Returns (root, game_element).
@@ -107,14 +170,18 @@ def extract_game_from_raw_xml(raw_text: str) -> Tuple[ET.Element, ET.Element]:
         raise ValueError("Empty raw_text")
 
     try:
-        root = ET.fromstring(raw_text)
+        # bytes: lxml rejects str input that carries an encoding declaration
+        root = ET.fromstring(raw_text.encode("utf-8"), parser=_xml_parser())
     except ET.ParseError as e:
         # Sometimes raw_text may contain invalid leading chars; try to salvage by trimming before '<'
+        # (with a recovering parser, which also tolerates damage after the leading junk)
         idx = raw_text.find("<")
         if idx > 0:
-            root = ET.fromstring(raw_text[idx:])
+            root = ET.fromstring(raw_text[idx:].encode("utf-8"), parser=_xml_parser(recover=True))
         else:
             raise ValueError(f"XML parse error: {e}") from e
+        if root is None:
+            raise ValueError(f"XML parse error: {e}") from e
 
     tag = root.tag.lower()
 
@@ -145,41 +212,94 @@ def extract_game_from_raw_xml(raw_text: str) -> Tuple[ET.Element, ET.Element]:
     return root, game
 
 
-def parse_players(game_el: ET.Element) -> List[Dict]:
+def iter_games(raw_text: str) -> Iterator[ET.Element]:
+    """
+    Yields the <game> elements of raw_text as they are parsed (iterparse), so a
+    session with many games is never held in memory as a whole tree.
+    Each game is cleared (and dropped from its parent) once the caller moves on.
+    """
+    source = BytesIO(raw_text.encode("utf-8"))
+    if not HAVE_LXML:
+        # stdlib iterparse: no tag= filter and no getparent(); clearing each
+        # game is what keeps memory flat (only empty <game/> shells remain)
+        for _, elem in ET.iterparse(source, events=("end",), parser=_xml_parser()):
+            if elem.tag == "game":
+                yield elem
+                elem.clear()
+        return
+
+    for _, game in ET.iterparse(source, events=("end",), tag="game", encoding="utf-8"):
+        yield game
+        game.clear()
+        parent = game.getparent()
+        if parent is not None:
+            while game.getprevious() is not None:
+                del parent[0]
+
+
+def extract_first_game(raw_text: str) -> ET.Element:
+    """
+    The <game> element for this hand: the first one in raw_text. Parsing stops
+    right after it. Anything unusual (leading junk, broken XML, no <game>) goes
+    through extract_game_from_raw_xml for its salvage logic / error messages.
+    """
+    raw_text = raw_text.strip()
+    try:
+        game = next(iter_games(raw_text), None)
+    except ET.ParseError:
+        game = None
+    if game is None:
+        _, game = extract_game_from_raw_xml(raw_text)
+    return game
+
+
+@dataclass(slots=True)
+class PlayerRow:
+    """One <player> of a hand (slotted: no per-instance __dict__)."""
+    screen_name: str
+    seat: Optional[int]
+    starting_stack: Amount
+    is_dealer: bool
+    bet_total: Amount
+    win_total: Amount
+
+
+def parse_players(game_el: ET.Element) -> List[PlayerRow]:
     """
     Parse players from:
       <general><players><player .../></players></general>
-    Returns list of dict:
-      {
-        screen_name, seat, starting_stack, is_dealer,
-        bet_total, win_total
-      }
+    Returns list of PlayerRow:
+      (screen_name, seat, starting_stack, is_dealer, bet_total, win_total)
     """
-    players: List[Dict] = []
+    players: List[PlayerRow] = []
 
     players_parent = game_el.find("./general/players")
     if players_parent is None:
         return players
 
     for p in players_parent.findall("./player"):
-        name = (p.get("name") or "").strip()
+        # lxml's Element.get is already a C-level lookup (.attrib.get is slower:
+        # it builds a proxy object); bind it once per element
+        get = p.get
+        name = (get("name") or "").strip()
         if not name:
             continue
 
-        seat = p.get("seat")
-        dealer = p.get("dealer")
-        chips = p.get("chips")  # starting stack
-        bet = p.get("bet")      # total invested in hand
-        win = p.get("win")      # chips returned/won
-
-        players.append({
-            "screen_name": name,
-            "seat": int(seat) if seat and seat.isdigit() else None,
-            "starting_stack": parse_decimal(chips) or Decimal(0),
-            "is_dealer": (str(dealer).strip() == "1"),
-            "bet_total": parse_decimal(bet) or Decimal(0),
-            "win_total": parse_decimal(win) or Decimal(0),
-        })
+        # numeric attrs go raw (no strip): the converters handle padding themselves
+        seat = get("seat")
+        dealer = get("dealer")
+        chips = get("chips")  # starting stack
+        bet = get("bet")      # total invested in hand
+        win = get("win")      # chips returned/won
+
+        players.append(PlayerRow(
+            screen_name=name,
+            seat=int(seat) if seat and seat.isdigit() else None,
+            starting_stack=parse_amount(chips),
+            is_dealer=(dealer == "1" or str(dealer).strip() == "1"),
+            bet_total=parse_amount(bet),
+            win_total=parse_amount(win),
+        ))
 
     return players
 
@@ -228,168 +348,368 @@ def parse_boards(game_el: ET.Element) -> Dict[str, Optional[str]]:
     return board
 
 
-def parse_actions(game_el: ET.Element) -> List[Dict]:
+# Sort key for actions (built once, not per parse_actions call)
+_STREET_ORDER = {"preflop": 0, "flop": 1, "turn": 2, "river": 3}
+# The key is one small int, street in the high bits and action no in the low
+# 26 bits: list.sort compares those with its single-digit int fast path instead
+# of comparing tuples (numpy.lexsort would need numpy for the same effect).
+# Actions without a usable no="" (or one outside 0..2**26-2) go last in their street.
+_ANO_BITS = 26
+_ANO_LAST = (1 << _ANO_BITS) - 1
+
+
+@dataclass(slots=True)
+class ActionColumns:
+    """
+    Actions of a hand as parallel lists (structure of arrays): entry i of every
+    column belongs to the i-th action. Avoids one dict per action.
+    """
+    streets: List[str] = field(default_factory=list)
+    action_nos: List[int] = field(default_factory=list)
+    players: List[str] = field(default_factory=list)
+    action_types: List[str] = field(default_factory=list)
+    amounts: List[Amount] = field(default_factory=list)
+    allins: List[bool] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.streets)
+
+    def as_dicts(self) -> List[Dict]:
+        """Row view (one dict per action), for printing / debugging only."""
+        return [
+            {"street": st, "action_no": no, "player": pl, "action_type": at, "amount": am, "is_allin": ai}
+            for st, no, pl, at, am, ai in zip(
+                self.streets, self.action_nos, self.players,
+                self.action_types, self.amounts, self.allins,
+            )
+        ]
+
+
+def parse_actions(game_el: ET.Element) -> ActionColumns:
     """
     Parse actions from:
       <round no="X"><action no=".." player=".." sum=".." type=".."/></round>
-    Returns list dict:
-      {street, action_no, player, action_type, amount, is_allin}
+    Returns ActionColumns (parallel lists):
+      streets, action_nos, players, action_types, amounts, allins
     """
-    actions: List[Dict] = []
+    # Sort key per action, computed once while parsing; the sort below only
+    # compares ready-made ints
+    keys: List[int] = []
+    streets: List[str] = []
+    players: List[str] = []
+    action_types: List[str] = []
+    amounts: List[Amount] = []
+    allins: List[bool] = []
+    # bound appends: no attribute lookup per action in the loop below
+    append_key, append_street, append_player = keys.append, streets.append, players.append
+    append_type, append_amount, append_allin = action_types.append, amounts.append, allins.append
 
     for rnd in game_el.findall("./round"):
         rno = rnd.get("no")
         street = street_from_round_no(rno)
+        street_key = _STREET_ORDER.get(street, 9) << _ANO_BITS
 
         for a in rnd.findall("./action"):
-            player = (a.get("player") or "").strip()
+            get = a.get
+            player = (get("player") or "").strip()
             if not player:
                 continue
 
-            action_no = a.get("no")
-            try:
-                ano = int(str(action_no).replace(",", "").strip())
-            except Exception:
-                # fallback: append at end
-                ano = None
+            action_no = get("no")
+            if action_no is not None and action_no.isdecimal():
+                ano = int(action_no)
+            else:
+                try:
+                    ano = int(str(action_no).replace(",", "").strip())
+                except Exception:
+                    # fallback: append at end
+                    ano = _ANO_LAST
+
+            atype = map_action_type(get("type"))
+
+            append_key(street_key | (ano if 0 <= ano < _ANO_LAST else _ANO_LAST))
+            append_street(street)
+            append_player(player)
+            append_type(atype)
+            append_amount(parse_amount(get("sum")))
+            append_allin(atype == "ALLIN")
+
+    # ensure action_no is sequential and deterministic (stable sort on the key only);
+    # the permutation is applied to every column
+    order = sorted(range(len(keys)), key=keys.__getitem__)
+    return ActionColumns(
+        streets=[streets[i] for i in order],
+        action_nos=list(range(1, len(order) + 1)),
+        players=[players[i] for i in order],
+        action_types=[action_types[i] for i in order],
+        amounts=[amounts[i] for i in order],
+        allins=[allins[i] for i in order],
+    )
 
-            amount = parse_decimal(a.get("sum")) or Decimal(0)
-            atype = map_action_type(a.get("type"))
 
-            is_allin = (atype == "ALLIN")
+# --- DB upserts ---------------------------------------------------------------
 
-            actions.append({
-                "street": street,
-                "action_no": ano,  # may be None, we reindex later
-                "player": player,
-                "action_type": atype,
-                "amount": amount,
-                "is_allin": is_allin,
-            })
+# Rows per multi-row INSERT statement (7 columns x 1000 rows stays far below
+# PostgreSQL's 65535 bind parameters limit)
+INSERT_PAGE_SIZE = 1000
 
-    # ensure action_no is sequential and deterministic
-    actions.sort(key=lambda x: ({"preflop": 0, "flop": 1, "turn": 2, "river": 3}.get(x["street"], 9),
-                                x["action_no"] if x["action_no"] is not None else 10**9))
-    for i, a in enumerate(actions, start=1):
-        a["action_no"] = i
 
-    return actions
+def insert_values(cur, insert_sql: str, rows: List[tuple], suffix: str = "",
+                  page_size: int = INSERT_PAGE_SIZE, fetch: bool = False) -> List[tuple]:
+    """
+    Multi-row INSERT: one statement (one round trip) per page_size rows instead
+    of one per row. insert_sql ends with "VALUES"; the placeholders are appended here,
+    followed by suffix (ON CONFLICT ... / RETURNING ...).
+    With fetch=True returns the RETURNING rows of all pages.
+    """
+    returned: List[tuple] = []
+    if not rows:
+        return returned
+
+    placeholder = "(" + ", ".join(["%s"] * len(rows[0])) + ")"
+    for start in range(0, len(rows), page_size):
+        page = rows[start:start + page_size]
+        cur.execute(
+            insert_sql + " " + ", ".join([placeholder] * len(page)) + (" " + suffix if suffix else ""),
+            [value for row in page for value in row],
+        )
+        if fetch:
+            returned.extend(cur.fetchall())
 
+    return returned
 
-# --- DB upserts ---------------------------------------------------------------
 
-def upsert_player(conn, user_id: int, screen_name: str) -> int:
+# --- Batched writes (many rows / many hands per statement) -------------------
+# The *_rows helpers only build tuples; the upsert_* / replace_*_many functions
+# write them with one multi-row statement, so a whole batch of hands costs a
+# handful of round trips instead of one per player / street / action.
+
+STREETS = ("preflop", "flop", "turn", "river")
+
+
+def upsert_players(conn, user_id: int, screen_names) -> Dict[str, int]:
+    """Upsert all the given players in one statement. Returns screen_name -> player_id."""
+    # ON CONFLICT DO UPDATE can't touch the same row twice in one statement: dedupe
+    names = list(dict.fromkeys(screen_names))
+    if not names:
+        return {}
+
     with conn.cursor() as cur:
-        cur.execute(
-            """
-            INSERT INTO players (user_id, screen_name)
-            VALUES (%s, %s)
+        rows = insert_values(
+            cur,
+            "INSERT INTO players (user_id, screen_name) VALUES",
+            [(user_id, name) for name in names],
+            suffix="""
             ON CONFLICT (user_id, screen_name)
             DO UPDATE SET screen_name = EXCLUDED.screen_name
-            RETURNING id
+            RETURNING id, screen_name
             """,
-            (user_id, screen_name),
+            fetch=True,
         )
-        return cur.fetchone()[0]
+    return {screen_name: pid for pid, screen_name in rows}
+
+
+# user_id -> {screen_name: player_id}, shared by all batches of the run.
+# Only holds ids of committed rows: call clear_player_id_cache() after a rollback.
+_PLAYER_ID_CACHE: Dict[int, Dict[str, int]] = {}
 
 
-def upsert_hand_player(conn, hand_id: int, player_id: int, seat: Optional[int],
-                       starting_stack: Decimal, is_dealer: bool):
+def clear_player_id_cache(user_id: Optional[int] = None) -> None:
+    if user_id is None:
+        _PLAYER_ID_CACHE.clear()
+    else:
+        _PLAYER_ID_CACHE.pop(user_id, None)
+
+
+def resolve_player_ids(conn, user_id: int, screen_names) -> Dict[str, int]:
+    """
+    screen_name -> player_id for all names, creating missing players.
+    Cached names cost nothing; the rest are looked up with one SELECT ... = ANY
+    and only the truly new ones go through upsert_players.
+    """
+    cache = _PLAYER_ID_CACHE.setdefault(user_id, {})
+    names = list(dict.fromkeys(screen_names))
+
+    missing = [name for name in names if name not in cache]
+    if missing:
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT id, screen_name FROM players WHERE user_id = %s AND screen_name = ANY(%s)",
+                (user_id, missing),
+            )
+            for pid, screen_name in cur.fetchall():
+                cache[screen_name] = pid
+
+        new_names = [name for name in missing if name not in cache]
+        if new_names:
+            cache.update(upsert_players(conn, user_id, new_names))
+
+    return {name: cache[name] for name in names}
+
+
+def hand_player_rows(hand_id: int, players: List[PlayerRow], player_name_to_id: Dict[str, int]) -> List[tuple]:
+    return [
+        (hand_id, player_name_to_id[p.screen_name], p.seat, p.starting_stack, p.is_dealer)
+        for p in players
+    ]
+
+
+def upsert_hand_players(conn, rows: List[tuple]) -> None:
+    # last row wins for a repeated (hand_id, player_id), like one upsert per row did
+    rows = list({(r[0], r[1]): r for r in rows}.values())
     with conn.cursor() as cur:
-        cur.execute(
-            """
-            INSERT INTO hand_players (hand_id, player_id, seat, starting_stack, is_dealer)
-            VALUES (%s, %s, %s, %s, %s)
+        insert_values(
+            cur,
+            "INSERT INTO hand_players (hand_id, player_id, seat, starting_stack, is_dealer) VALUES",
+            rows,
+            suffix="""
             ON CONFLICT (hand_id, player_id)
             DO UPDATE SET
                 seat = EXCLUDED.seat,
                 starting_stack = EXCLUDED.starting_stack,
                 is_dealer = EXCLUDED.is_dealer
             """,
-            (hand_id, player_id, seat, starting_stack, is_dealer),
         )
 
 
-def upsert_street(conn, hand_id: int, street: str, board: Optional[str]):
+def street_rows(hand_id: int, boards: Dict[str, Optional[str]]) -> List[tuple]:
+    # always ensure the 4 streets exist (like your old v1 did)
+    return [(hand_id, street, boards.get(street)) for street in STREETS]
+
+
+def upsert_streets(conn, rows: List[tuple]) -> None:
+    rows = list({(r[0], r[1]): r for r in rows}.values())
     with conn.cursor() as cur:
-        cur.execute(
-            """
-            INSERT INTO streets (hand_id, street, board)
-            VALUES (%s, %s, %s)
+        insert_values(
+            cur,
+            "INSERT INTO streets (hand_id, street, board) VALUES",
+            rows,
+            suffix="""
             ON CONFLICT (hand_id, street)
             DO UPDATE SET board = EXCLUDED.board
             """,
-            (hand_id, street, board),
         )
 
 
-def replace_actions(conn, hand_id: int, actions: List[Dict], player_name_to_id: Dict[str, int]) -> int:
+def action_rows(hand_id: int, actions: ActionColumns, player_name_to_id: Dict[str, int]) -> List[tuple]:
+    rows = []
+    # zip over the columns: the row tuple is built straight from the parsed lists
+    for street, action_no, player, action_type, amount, is_allin in zip(
+        actions.streets, actions.action_nos, actions.players,
+        actions.action_types, actions.amounts, actions.allins,
+    ):
+        pid = player_name_to_id.get(player)
+        if not pid:
+            # action references a player not in players list; skip
+            continue
+        rows.append((hand_id, street, action_no, pid, action_type, amount, is_allin))
+    return rows
+
+
+def replace_actions_many(conn, hand_ids: List[int], rows: List[tuple], *, existing: bool = True) -> int:
+    """
+    Replace the actions of all hand_ids with rows (from action_rows).
+    existing=False: the hands were never parsed, so there is nothing to DELETE
+    (saves an index scan per batch).
+    """
     with conn.cursor() as cur:
-        cur.execute("DELETE FROM actions WHERE hand_id = %s", (hand_id,))
+        if existing:
+            cur.execute("DELETE FROM actions WHERE hand_id = ANY(%s)", (list(hand_ids),))
+        insert_values(
+            cur,
+            "INSERT INTO actions (hand_id, street, action_no, player_id, action_type, amount, is_allin) VALUES",
+            rows,
+        )
+    return len(rows)
 
-        if not actions:
-            return 0
 
-        rows = []
-        for a in actions:
-            pid = player_name_to_id.get(a["player"])
-            if not pid:
-                # action references a player not in players list; skip
-                continue
-            rows.append((
-                hand_id,
-                a["street"],
-                a["action_no"],
-                pid,
-                a["action_type"],
-                a["amount"],
-                a["is_allin"],
-            ))
-
-        if rows:
-            cur.executemany(
-                """
-                INSERT INTO actions (hand_id, street, action_no, player_id, action_type, amount, is_allin)
-                VALUES (%s, %s, %s, %s, %s, %s, %s)
-                """,
-                rows,
-            )
+def hand_result_rows(hand_id: int, results: List[Dict], player_name_to_id: Dict[str, int]) -> List[tuple]:
+    rows = []
+    for r in results:
+        pid = player_name_to_id.get(r["player"])
+        if not pid:
+            continue
+        won = r.get("won_amount") or Decimal(0)
+        net = r.get("net_amount") or Decimal(0)
+        rows.append((hand_id, pid, won, net))
+    return rows
 
-        return len(rows)
 
+def replace_hand_results_many(conn, hand_ids: List[int], rows: List[tuple], *, existing: bool = True) -> int:
+    """
+    Replace the hand_results of all hand_ids with rows (from hand_result_rows).
+    existing=False: the hands were never parsed, so there is nothing to DELETE
+    (saves an index scan per batch).
+    """
+    with conn.cursor() as cur:
+        if existing:
+            cur.execute("DELETE FROM hand_results WHERE hand_id = ANY(%s)", (list(hand_ids),))
+        insert_values(
+            cur,
+            "INSERT INTO hand_results (hand_id, player_id, won_amount, net_amount) VALUES",
+            rows,
+        )
+    return len(rows)
+
+
+# --- Binary COPY (psycopg 3) for rows known to be new ----------------------------
 
-def replace_hand_results(conn, hand_id: int, results: List[Dict], player_name_to_id: Dict[str, int]) -> int:
+ACTIONS_COPY_TYPES = ["int8", "text", "int4", "int8", "text", "numeric", "bool"]
+HAND_RESULTS_COPY_TYPES = ["int8", "int8", "numeric", "numeric"]
+
+
+def copy_rows(cur, copy_sql: str, types: List[str], rows: List[tuple]) -> None:
+    """
+    Stream rows with COPY ... FROM STDIN (FORMAT BINARY): no SQL text to parse and
+    no text encoding of numbers/bools. COPY has no ON CONFLICT, so only use it
+    for hands that have no rows yet in the target table.
+    """
+    with cur.copy(copy_sql) as copy:
+        copy.set_types(types)
+        for row in rows:
+            copy.write_row(row)
+
+
+def copy_actions(conn, rows: List[tuple]) -> int:
+    """Bulk load action_rows of never-parsed hands."""
     with conn.cursor() as cur:
-        cur.execute("DELETE FROM hand_results WHERE hand_id = %s", (hand_id,))
+        copy_rows(
+            cur,
+            "COPY actions (hand_id, street, action_no, player_id, action_type, amount, is_allin) "
+            "FROM STDIN (FORMAT BINARY)",
+            ACTIONS_COPY_TYPES,
+            rows,
+        )
+    return len(rows)
 
-        if not results:
-            return 0
 
-        rows = []
-        for r in results:
-            pid = player_name_to_id.get(r["player"])
-            if not pid:
-                continue
-            won = r.get("won_amount") or Decimal(0)
-            net = r.get("net_amount") or Decimal(0)
-            rows.append((hand_id, pid, won, net))
-
-        if rows:
-            cur.executemany(
-                """
-                INSERT INTO hand_results (hand_id, player_id, won_amount, net_amount)
-                VALUES (%s, %s, %s, %s)
-                """,
-                rows,
-            )
+def copy_hand_results(conn, rows: List[tuple]) -> int:
+    """Bulk load hand_result_rows of never-parsed hands."""
+    with conn.cursor() as cur:
+        copy_rows(
+            cur,
+            "COPY hand_results (hand_id, player_id, won_amount, net_amount) FROM STDIN (FORMAT BINARY)",
+            HAND_RESULTS_COPY_TYPES,
+            rows,
+        )
+    return len(rows)
+
 
-        return len(rows)
+def replace_actions(conn, hand_id: int, actions: ActionColumns, player_name_to_id: Dict[str, int],
+                    *, existing: bool = True) -> int:
+    return replace_actions_many(conn, [hand_id], action_rows(hand_id, actions, player_name_to_id), existing=existing)
+
+
+def replace_hand_results(conn, hand_id: int, results: List[Dict], player_name_to_id: Dict[str, int],
+                         *, existing: bool = True) -> int:
+    return replace_hand_results_many(conn, [hand_id], hand_result_rows(hand_id, results, player_name_to_id),
+                                     existing=existing)
 
 
 # --- Main processing ----------------------------------------------------------
 
 def process_hand(conn, user_id: int, hand_id: int, game_id: str, raw_text: str, dry_run: bool = False) -> Dict:
-    root, game_el = extract_game_from_raw_xml(raw_text)
+    game_el = extract_first_game(raw_text)
 
     players = parse_players(game_el)
     boards = parse_boards(game_el)
@@ -398,10 +718,10 @@ def process_hand(conn, user_id: int, hand_id: int, game_id: str, raw_text: str,
     # build results from players list
     results = []
     for p in players:
-        bet_total = p["bet_total"]
-        win_total = p["win_total"]
+        bet_total = p.bet_total
+        win_total = p.win_total
         results.append({
-            "player": p["screen_name"],
+            "player": p.screen_name,
             "won_amount": win_total,
             "net_amount": (win_total - bet_total),
         })
@@ -415,31 +735,20 @@ def process_hand(conn, user_id: int, hand_id: int, game_id: str, raw_text: str,
             "results": results,
         }
 
-    # upsert players and mapping
-    player_name_to_id: Dict[str, int] = {}
-    for p in players:
-        pid = upsert_player(conn, user_id, p["screen_name"])
-        player_name_to_id[p["screen_name"]] = pid
-
-    # hand_players
-    for p in players:
-        pid = player_name_to_id[p["screen_name"]]
-        upsert_hand_player(
-            conn,
-            hand_id,
-            pid,
-            p["seat"],
-            p["starting_stack"],
-            p["is_dealer"],
-        )
+    # players and mapping (cached ids + one statement for the new ones)
+    player_name_to_id = resolve_player_ids(conn, user_id, [p.screen_name for p in players])
 
-    # streets: always ensure the 4 streets exist (like your old v1 did)
-    for street in ("preflop", "flop", "turn", "river"):
-        upsert_street(conn, hand_id, street, boards.get(street))
+    # Pipeline mode: none of the writes below reads a result back, so they are
+    # sent in one go and the server answers are collected at the end of the
+    # block (one round trip instead of one per statement)
+    with conn.pipeline():
+        # hand_players + streets, one statement each
+        upsert_hand_players(conn, hand_player_rows(hand_id, players, player_name_to_id))
+        upsert_streets(conn, street_rows(hand_id, boards))
 
-    # actions + results
-    inserted_actions = replace_actions(conn, hand_id, actions, player_name_to_id)
-    inserted_results = replace_hand_results(conn, hand_id, results, player_name_to_id)
+        # actions + results
+        inserted_actions = replace_actions(conn, hand_id, actions, player_name_to_id)
+        inserted_results = replace_hand_results(conn, hand_id, results, player_name_to_id)
 
     return {
         "players_count": len(players),
@@ -450,6 +759,11 @@ def process_hand(conn, user_id: int, hand_id: int, game_id: str, raw_text: str,
     }
 
 
+# Hands per transaction: one COMMIT (WAL flush) per chunk instead of per hand;
+# each hand still runs in its own savepoint so a bad hand only loses itself
+COMMIT_EVERY = 200
+
+
 def main():
     parser = argparse.ArgumentParser(description="Parse ChampionPoker iPoker XML (from hands.raw_text) into relational tables")
     parser.add_argument("--user", required=True, help="Username (in your case you used '1')")
@@ -473,7 +787,9 @@ def main():
     errors = 0
 
     try:
-        with psycopg.connect(database_url) as conn:
+        # prepare_threshold=1: the INSERT/DELETE texts repeat for every hand, so
+        # they are prepared server-side on first use and only executed afterwards
+        with psycopg.connect(database_url, prepare_threshold=1) as conn:
             user_id = get_user_id(conn, args.user)
 
             with conn.cursor() as cur:
@@ -488,6 +804,8 @@ def main():
                     (user_id, args.limit, args.offset),
                 )
                 hands = cur.fetchall()
+            # close the implicit read transaction: the chunks below open their own
+            conn.commit()
 
             if not hands:
                 print(f"No hands found for user '{args.user}' limit={args.limit} offset={args.offset}")
@@ -498,41 +816,46 @@ def main():
                 print("DRY RUN MODE - No DB writes\n")
 
             shown = 0
-            for hand_id, game_id, source_file, raw_text in hands:
-                try:
-                    r = process_hand(conn, user_id, hand_id, game_id, raw_text, dry_run=args.dry_run)
-
-                    if args.dry_run:
-                        if shown < 3:
-                            shown += 1
-                            print(f"--- Hand game_id={r['game_id']} ---")
-                            print(f"Players: {len(r['players'])}")
-                            for p in r["players"]:
-                                d = " [DEALER]" if p["is_dealer"] else ""
-                                print(f"  seat={p['seat']} {p['screen_name']} stack={p['starting_stack']}{d}")
-                            print("Boards:")
-                            for s in ("flop", "turn", "river"):
-                                if r["boards"].get(s):
-                                    print(f"  {s}: {r['boards'][s]}")
-                            print("Actions (first 20):")
-                            for a in r["actions"][:20]:
-                                print(f"  {a['action_no']:>3} [{a['street']}] {a['player']}: {a['action_type']} ({a['amount']})")
-                            print()
-                    else:
-                        total_players += r["players_count"]
-                        total_hand_players += r["hand_players_count"]
-                        total_streets += r["streets_count"]
-                        total_actions += r["actions_count"]
-                        total_results += r["results_count"]
-                        conn.commit()
-
-                    parsed_hands += 1
-
-                except Exception as e:
-                    errors += 1
-                    print(f"ERROR processing game_id={game_id}, source={source_file}: {e}")
-                    if not args.dry_run:
-                        conn.rollback()
+            # outer block = one transaction per chunk, inner block = savepoint per hand
+            transaction = nullcontext if args.dry_run else conn.transaction
+            for start in range(0, len(hands), COMMIT_EVERY):
+                with transaction():
+                    for hand_id, game_id, source_file, raw_text in hands[start:start + COMMIT_EVERY]:
+                        try:
+                            with transaction():
+                                r = process_hand(conn, user_id, hand_id, game_id, raw_text, dry_run=args.dry_run)
+
+                            if args.dry_run:
+                                if shown < 3:
+                                    shown += 1
+                                    print(f"--- Hand game_id={r['game_id']} ---")
+                                    print(f"Players: {len(r['players'])}")
+                                    for p in r["players"]:
+                                        d = " [DEALER]" if p.is_dealer else ""
+                                        print(f"  seat={p.seat} {p.screen_name} stack={p.starting_stack}{d}")
+                                    print("Boards:")
+                                    for s in ("flop", "turn", "river"):
+                                        if r["boards"].get(s):
+                                            print(f"  {s}: {r['boards'][s]}")
+                                    print("Actions (first 20):")
+                                    for a in r["actions"].as_dicts()[:20]:
+                                        print(f"  {a['action_no']:>3} [{a['street']}] {a['player']}: {a['action_type']} ({a['amount']})")
+                                    print()
+                            else:
+                                total_players += r["players_count"]
+                                total_hand_players += r["hand_players_count"]
+                                total_streets += r["streets_count"]
+                                total_actions += r["actions_count"]
+                                total_results += r["results_count"]
+
+                            parsed_hands += 1
+
+                        except Exception as e:
+                            errors += 1
+                            print(f"ERROR processing game_id={game_id}, source={source_file}: {e}")
+                            if not args.dry_run:
+                                # ids of players created in the rolled back savepoint are gone
+                                clear_player_id_cache(user_id)
 
             print("-" * 40)
             if args.dry_run:
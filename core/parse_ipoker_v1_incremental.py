@@ -7,7 +7,8 @@ Processes only unparsed hands (NOT EXISTS in hand_players).
 import os
 import sys
 import argparse
-from decimal import Decimal
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
 
 # --- FIX IMPORT PATH (para que "core.*" funcione al ejecutar scripts sueltos) ---
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
@@ -16,20 +17,25 @@ if PROJECT_ROOT not in sys.path:
 # -----------------------------------------------------------------------------
 
 from dotenv import load_dotenv
-import psycopg2
-from psycopg2.extras import DictCursor
+import psycopg
+from psycopg.rows import dict_row
 
 # Import the actual functions from parse_ipoker_v1
 from core.parse_ipoker_v1 import (
-    extract_game_from_raw_xml,
+    extract_first_game,
     parse_players,
     parse_boards,
     parse_actions,
-    upsert_player,
-    upsert_hand_player,
-    upsert_street,
-    replace_actions,
-    replace_hand_results,
+    resolve_player_ids,
+    clear_player_id_cache,
+    hand_player_rows,
+    upsert_hand_players,
+    street_rows,
+    upsert_streets,
+    action_rows,
+    copy_actions,
+    hand_result_rows,
+    copy_hand_results,
     get_user_id,
 )
 
@@ -41,15 +47,22 @@ def get_db_conn():
     dsn = os.getenv("DATABASE_URL")
     if not dsn:
         raise RuntimeError("DATABASE_URL not set (check .env)")
-    return psycopg2.connect(dsn)
+    # prepare_threshold=1: the batch statements repeat, prepare them on first use
+    return psycopg.connect(dsn, prepare_threshold=1)
 
 
-def fetch_unparsed_hands(cur, user_id, limit=None, offset=0):
+def create_unparsed_ids(cur, user_id):
     """
-    Fetch hands that have NOT been parsed yet (no entries in hand_players).
+    Materialize the ids of the hands NOT parsed yet (no entries in hand_players)
+    into the session temp table unparsed_ids. The anti-join runs once per run;
+    batches then read the table by id range.
+    Returns the number of pending hands.
     """
-    sql = """
-        SELECT h.id, h.game_id, h.raw_text
+    cur.execute("DROP TABLE IF EXISTS unparsed_ids")
+    cur.execute(
+        """
+        CREATE TEMP TABLE unparsed_ids AS
+        SELECT h.id
         FROM hands h
         WHERE h.user_id = %s
           AND NOT EXISTS (
@@ -57,25 +70,52 @@ def fetch_unparsed_hands(cur, user_id, limit=None, offset=0):
               FROM hand_players hp
               WHERE hp.hand_id = h.id
           )
-        ORDER BY h.id
+        """,
+        (user_id,),
+    )
+    cur.execute("CREATE INDEX ON unparsed_ids (id)")
+    cur.execute("ANALYZE unparsed_ids")
+    cur.execute("SELECT COUNT(*) AS pending FROM unparsed_ids")
+    return cur.fetchone()["pending"]
+
+
+def fetch_unparsed_hands(cur, limit=None, offset=0, after_id=None):
+    """
+    Fetch hands that have NOT been parsed yet (ids from create_unparsed_ids).
+    Keyset pagination: pass after_id = last h.id of the previous batch, so each
+    batch starts with an index descent instead of re-scanning skipped rows.
     """
-    params = [user_id]
+    sql = """
+        SELECT h.id, h.game_id, h.raw_text
+        FROM unparsed_ids u
+        JOIN hands h ON h.id = u.id
+    """
+    params = []
+
+    if after_id is not None:
+        sql += " WHERE u.id > %s"
+        params.append(after_id)
+
+    sql += " ORDER BY u.id"
 
     if limit is not None:
-        sql += " LIMIT %s OFFSET %s"
-        params.extend([limit, offset])
+        sql += " LIMIT %s"
+        params.append(limit)
+        if offset:
+            sql += " OFFSET %s"
+            params.append(offset)
 
     cur.execute(sql, params)
     return cur.fetchall()
 
 
-def process_hand_incremental(conn, user_id, hand_id, game_id, raw_text):
+def parse_hand_incremental(raw_text):
     """
-    Process a single hand using functions from parse_ipoker_v1.py.
-    Returns dict with counts of inserted records.
+    Parse a single hand using functions from parse_ipoker_v1.py (no DB access).
+    Returns dict with players, boards, actions and results.
     """
     # Extract and parse XML
-    root, game_el = extract_game_from_raw_xml(raw_text)
+    game_el = extract_first_game(raw_text)
     players = parse_players(game_el)
     boards = parse_boards(game_el)
     actions = parse_actions(game_el)
@@ -83,47 +123,91 @@ def process_hand_incremental(conn, user_id, hand_id, game_id, raw_text):
     # Build results from players list
     results = []
     for p in players:
-        bet_total = p["bet_total"]
-        win_total = p["win_total"]
+        bet_total = p.bet_total
+        win_total = p.win_total
         results.append({
-            "player": p["screen_name"],
+            "player": p.screen_name,
             "won_amount": win_total,
             "net_amount": (win_total - bet_total),
         })
 
-    # Upsert players and build name->id mapping
-    player_name_to_id = {}
-    for p in players:
-        pid = upsert_player(conn, user_id, p["screen_name"])
-        player_name_to_id[p["screen_name"]] = pid
+    return {
+        "players": players,
+        "boards": boards,
+        "actions": actions,
+        "results": results,
+    }
+
+
+def parse_only(raw_text):
+    """
+    Process pool worker: parse one hand (CPU only, no DB).
+    Returns (parsed, error) so one bad hand doesn't stop the map; parsed holds
+    plain rows/lists, never lxml elements (they don't pickle).
+    """
+    try:
+        return parse_hand_incremental(raw_text), None
+    except Exception as e:
+        return None, str(e)
 
-    # Insert hand_players
-    for p in players:
-        pid = player_name_to_id[p["screen_name"]]
-        upsert_hand_player(
-            conn,
-            hand_id,
-            pid,
-            p["seat"],
-            p["starting_stack"],
-            p["is_dealer"],
-        )
-
-    # Insert streets (always ensure 4 streets exist)
-    for street in ("preflop", "flop", "turn", "river"):
-        upsert_street(conn, hand_id, street, boards.get(street))
-
-    # Insert actions and results
-    inserted_actions = replace_actions(conn, hand_id, actions, player_name_to_id)
-    inserted_results = replace_hand_results(conn, hand_id, results, player_name_to_id)
+
+def _parse_executor(workers):
+    """ProcessPoolExecutor for workers > 1, otherwise parse in this process."""
+    if workers > 1:
+        return ProcessPoolExecutor(max_workers=workers)
+    return nullcontext()
+
+
+def store_hands_batch(conn, user_id, parsed_hands):
+    """
+    Write a batch of parsed hands [(hand_id, parsed), ...].
+    Rows of every table are accumulated across the whole batch and flushed with
+    one multi-row statement (or one binary COPY) per table, instead of one
+    round trip per row.
+    Returns dict with counts of inserted records.
+    """
+    if not parsed_hands:
+        return {"players_count": 0, "actions_count": 0, "results_count": 0}
+
+    # Resolve all players of the batch (cached across batches) and build name->id mapping
+    player_name_to_id = resolve_player_ids(
+        conn,
+        user_id,
+        (p.screen_name for _, parsed in parsed_hands for p in parsed["players"]),
+    )
+
+    hp_rows, st_rows, act_rows, res_rows = [], [], [], []
+    for hand_id, parsed in parsed_hands:
+        hp_rows.extend(hand_player_rows(hand_id, parsed["players"], player_name_to_id))
+        # Streets (always ensure 4 streets exist)
+        st_rows.extend(street_rows(hand_id, parsed["boards"]))
+        act_rows.extend(action_rows(hand_id, parsed["actions"], player_name_to_id))
+        res_rows.extend(hand_result_rows(hand_id, parsed["results"], player_name_to_id))
+
+    upsert_hand_players(conn, hp_rows)
+    upsert_streets(conn, st_rows)
+
+    # Insert actions and results with binary COPY (hands come from the NOT EXISTS
+    # filter: no old rows to delete or conflict with)
+    inserted_actions = copy_actions(conn, act_rows)
+    inserted_results = copy_hand_results(conn, res_rows)
 
     return {
-        "players_count": len(players),
+        "players_count": sum(len(parsed["players"]) for _, parsed in parsed_hands),
         "actions_count": inserted_actions,
         "results_count": inserted_results,
     }
 
 
+def process_hand_incremental(conn, user_id, hand_id, game_id, raw_text):
+    """
+    Process a single hand using functions from parse_ipoker_v1.py.
+    Returns dict with counts of inserted records.
+    """
+    parsed = parse_hand_incremental(raw_text)
+    return store_hands_batch(conn, user_id, [(hand_id, parsed)])
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Incremental parser wrapper (process only unparsed hands)"
@@ -132,6 +216,12 @@ def main():
     parser.add_argument("--limit", type=int, help="Max hands to process (default: all)")
     parser.add_argument("--offset", type=int, default=0, help="Offset (default: 0)")
     parser.add_argument("--dry-run", action="store_true", help="Count only, don't process")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Processes used to parse hands (default: CPU count, 1 = no pool)",
+    )
     args = parser.parse_args()
 
     conn = get_db_conn()
@@ -149,20 +239,12 @@ def main():
         except ValueError:
             user_id = get_user_id(conn, args.user)
 
-        with conn.cursor(cursor_factory=DictCursor) as cur:
-            # Count pending hands
-            cur.execute(
-                """
-                SELECT COUNT(*)
-                FROM hands h
-                WHERE h.user_id = %s
-                  AND NOT EXISTS (
-                      SELECT 1 FROM hand_players hp WHERE hp.hand_id = h.id
-                  )
-                """,
-                (user_id,),
-            )
-            pending = cur.fetchone()[0]
+        # binary=True: ids/counts come back in binary format, no text parsing
+        with conn.cursor(row_factory=dict_row, binary=True) as cur, _parse_executor(args.workers) as executor:
+            # Snapshot + count pending hands; commit so a rollback of a failed
+            # batch later on can't drop the temp table
+            pending = create_unparsed_ids(cur, user_id)
+            conn.commit()
 
             if pending == 0:
                 print("No unparsed hands found. Nothing to do.")
@@ -177,42 +259,69 @@ def main():
             # Process in batches
             remaining = args.limit if args.limit is not None else pending
             offset = args.offset
+            last_id = None
 
             while remaining > 0:
                 batch_limit = min(BATCH_SIZE, remaining)
-                hands = fetch_unparsed_hands(cur, user_id, limit=batch_limit, offset=offset)
+                hands = fetch_unparsed_hands(cur, limit=batch_limit, offset=offset, after_id=last_id)
                 
                 if not hands:
                     break
 
                 print(f"Processing batch: {len(hands)} hand(s)...")
 
-                for h in hands:
-                    try:
-                        result = process_hand_incremental(
-                            conn,
-                            user_id,
-                            h["id"],
-                            h["game_id"],
-                            h["raw_text"]
-                        )
-                        
+                # Parse the whole batch first (no DB), fanned out over the pool;
+                # map keeps the results in hand order
+                raw_texts = [h["raw_text"] for h in hands]
+                if executor is None:
+                    results = map(parse_only, raw_texts)
+                else:
+                    results = executor.map(parse_only, raw_texts, chunksize=32)
+
+                parsed_hands = []
+                game_ids = {}
+                for h, (parsed, error) in zip(hands, results):
+                    if error is not None:
+                        total_errors += 1
+                        print(f"ERROR parsing hand_id={h['id']} game_id={h['game_id']}: {error}")
+                        continue
+                    parsed_hands.append((h["id"], parsed))
+                    game_ids[h["id"]] = h["game_id"]
+
+                # Write the batch with one statement per table
+                try:
+                    result = store_hands_batch(conn, user_id, parsed_hands)
+                    conn.commit()
+                    total_parsed += len(parsed_hands)
+                    total_actions += result["actions_count"]
+                    total_results += result["results_count"]
+                except Exception as e:
+                    # Retry hand by hand so one bad hand doesn't drop the whole batch
+                    conn.rollback()
+                    clear_player_id_cache(user_id)
+                    print(f"  Batch write failed ({e}), retrying hand by hand...")
+                    for hand_id, parsed in parsed_hands:
+                        try:
+                            result = store_hands_batch(conn, user_id, [(hand_id, parsed)])
+                            conn.commit()
+                        except Exception as e:
+                            total_errors += 1
+                            print(f"ERROR parsing hand_id={hand_id} game_id={game_ids[hand_id]}: {e}")
+                            conn.rollback()
+                            clear_player_id_cache(user_id)
+                            continue
+
                         total_parsed += 1
                         total_actions += result["actions_count"]
                         total_results += result["results_count"]
 
-                    except Exception as e:
-                        total_errors += 1
-                        print(f"ERROR parsing hand_id={h['id']} game_id={h['game_id']}: {e}")
-                        conn.rollback()
-                        continue
-
-                # Commit batch
-                conn.commit()
                 print(f"  Committed {len(hands)} hands")
 
                 remaining -= len(hands)
-                offset = 0  # After first batch, offset is implicit (no more unparsed at lower IDs)
+                # Next batch continues after the last id seen (hands that failed
+                # stay unparsed but are not fetched again in this run)
+                offset = 0
+                last_id = hands[-1]["id"]
 
     except Exception as e:
         print(f"\nFATAL ERROR: {e}")
@@ -19,10 +19,64 @@ Expected format:
 """
 
 import re
+import sys
+import hashlib
+from functools import lru_cache
 from decimal import Decimal, InvalidOperation
 from typing import Dict, List, Optional, Tuple
 
 
+# Compiled once at import (not looked up in re's cache per line)
+_GAME_RE = re.compile(r'^GAME\s+#(\d+)')
+_TABLE_SIZE_RE = re.compile(r'Table Size\s+(\d+)')
+_SEAT_RE = re.compile(r'^Seat\s+(\d+):\s+(\S+)\s+\(([€$\d.,]+)\s+in\s+chips\)\s*(DEALER)?', re.IGNORECASE)
+_ACTION_RE = re.compile(r'^([^:]+):\s+(.*)')
+_AMOUNT_RE = re.compile(r'([€$\d.,]+)')
+_POT_RE = re.compile(r'Total pot\s+([€$\d.,]+)')
+_WIN_RE = re.compile(r'^([^:]+):\s+wins\s+([€$\d.,]+)')
+
+# Amounts in the parsed dict are int cents (int + int in the loop instead of
+# Decimal arithmetic); store_parsed_hand converts them back with cents_to_decimal.
+
+# Street names / action types as interned module constants: every parsed action
+# points at the same str objects, so comparing or hashing them downstream hits
+# CPython's identity fast path. Player names get interned while parsing for the
+# same reason (one object per name instead of one per action line).
+_PREFLOP, _FLOP, _TURN, _RIVER = map(sys.intern, ('preflop', 'flop', 'turn', 'river'))
+(_POST_SB, _POST_BB, _POST_ANTE, _FOLD, _CHECK, _CALL, _BET, _RAISE) = map(
+    sys.intern, ('POST_SB', 'POST_BB', 'POST_ANTE', 'FOLD', 'CHECK', 'CALL', 'BET', 'RAISE')
+)
+
+# Action keywords by their first two characters (unique per keyword family), so
+# an action line is one dict hit + one startswith instead of a chain of them.
+# (keyword prefix, action_type, has_amount); action_type None = not an action.
+_ACTION_KEYWORDS = {
+    'Po': (('Post SB', _POST_SB, True), ('Post BB', _POST_BB, True), ('Post Ante', _POST_ANTE, True)),
+    'Fo': (('Fold', _FOLD, False),),
+    'Ch': (('Check', _CHECK, False),),
+    'Ca': (('Call', _CALL, True),),
+    'Be': (('Bet', _BET, True),),
+    'Ra': (('Raise', _RAISE, True),),
+    'De': (('Dealt to', None, False),),  # hole cards line
+}
+
+
+def _board_cards(line: str) -> Optional[str]:
+    """
+    Text of the first non-empty [...] in a street marker line, i.e. what
+    re.search(r'\[([^\]]+)\]', line) captures, with plain find/slice.
+    """
+    start = line.find('[')
+    while start != -1:
+        end = line.find(']', start + 1)
+        if end == -1:
+            return None
+        if end > start + 1:
+            return line[start + 1:end]
+        start = line.find('[', start + 1)
+    return None
+
+
 def parse_decimal(value: Optional[str]) -> Optional[Decimal]:
     """Parse a decimal value, handling currency symbols and thousands separators."""
     if value is None:
@@ -40,6 +94,41 @@ def parse_decimal(value: Optional[str]) -> Optional[Decimal]:
         return None
 
 
+@lru_cache(maxsize=1024)
+def parse_cents(value: Optional[str]) -> Optional[int]:
+    """
+    Parse an amount like parse_decimal does, as int cents (None if invalid).
+    Exact: an amount with a non-zero part below the cent ("1.005") raises
+    ValueError instead of being rounded, so no stored amount differs from the
+    Decimal the old parser produced ("1.500" is fine).
+    Cached: blinds and common bet sizes repeat across hands, and the result is an int.
+    """
+    if value is None:
+        return None
+    s = str(value).replace("€", "").replace("$", "").replace(",", "").strip()
+    if not s:
+        return None
+    
+    # Fast path: "12", "12.5", "12.50" -> plain int arithmetic
+    whole, dot, frac = s.partition(".")
+    if whole.isdigit() and (not dot or (frac.isdigit() and len(frac) <= 2)):
+        return int(whole) * 100 + (int(frac.ljust(2, "0")) if dot else 0)
+    
+    # Anything else (".5", more decimals, junk) goes through Decimal
+    d = parse_decimal(s)
+    if d is None or not d.is_finite():
+        return None
+    cents = d * 100
+    if cents != cents.to_integral_value():
+        raise ValueError(f"Amount with sub-cent precision: {value!r}")
+    return int(cents)
+
+
+def cents_to_decimal(cents: int) -> Decimal:
+    """int cents -> Decimal with 2 decimals (exact), for the NUMERIC columns."""
+    return Decimal(cents).scaleb(-2)
+
+
 def parse_pokertracker_ipoker(raw_text: str) -> Dict:
     """
     Parse a single PokerTracker iPoker hand history.
@@ -48,44 +137,63 @@ def parse_pokertracker_ipoker(raw_text: str) -> Dict:
         - game_id: str
         - table_size: int
         - players: List[Dict]  # {screen_name, seat, starting_stack, is_dealer}
+          (starting_stack and every other amount are int cents, see parse_cents)
         - streets: Dict[str, Optional[str]]  # {preflop, flop, turn, river}
         - actions: List[Dict]  # {street, action_no, player, action_type, amount, is_allin}
         - results: List[Dict]  # {player, won_amount, net_amount}
     """
-    lines = [line.strip() for line in raw_text.split('\n') if line.strip()]
+    # splitlines: one C-level split that also takes \r\n / \r; strip each line once
+    lines = [s for line in raw_text.splitlines() if (s := line.strip())]
     
     if not lines:
         raise ValueError("Empty hand text")
     
     # Extract game ID from first line
     first_line = lines[0]
-    game_match = re.match(r'^GAME\s+#(\d+)', first_line)
+    game_match = _GAME_RE.match(first_line)
     if not game_match:
         raise ValueError(f"Invalid hand format: missing GAME # line")
     
     game_id = game_match.group(1)
     
-    # Parse table size
+    # Single pass over the lines. Before *** SUMMARY *** every line goes through
+    # the street/action logic, after it through the results logic; seat lines are
+    # collected from anywhere in the hand and the table size from the first 10 lines.
     table_size = 2  # default
-    for line in lines[:10]:
-        if line.startswith("Table Size"):
-            match = re.search(r'Table Size\s+(\d+)', line)
-            if match:
-                table_size = int(match.group(1))
-                break
-    
-    # Parse players
+    table_size_found = False
     players = []
-    for line in lines:
+    streets = {_PREFLOP: None, _FLOP: None, _TURN: None, _RIVER: None}
+    actions = []
+    current_street = _PREFLOP
+    action_no = 0
+    results = []
+    winners = set()  # players with a "wins" line, marked while parsing them
+    in_summary = False
+    total_pot = 0
+    
+    # Track pot contributions for net calculation (checked against the seat
+    # lines once they've all been seen, see below)
+    invested_by_player = {}
+    
+    # Hot loop: bound methods in locals (no global/attribute lookups per line)
+    seat_re_match = _SEAT_RE.match
+    action_re_match = _ACTION_RE.match
+    amount_re_search = _AMOUNT_RE.search
+    keywords_for = _ACTION_KEYWORDS.get
+    invested_get = invested_by_player.get
+    append_action = actions.append
+    intern = sys.intern
+    
+    for line_no, line in enumerate(lines):
         # Seat X: <name> (€X.XX in chips) [DEALER]
-        seat_match = re.match(r'^Seat\s+(\d+):\s+(\S+)\s+\(([€$\d.,]+)\s+in\s+chips\)\s*(DEALER)?', line, re.IGNORECASE)
+        seat_match = seat_re_match(line)
         if seat_match:
             seat = int(seat_match.group(1))
-            screen_name = seat_match.group(2)
+            screen_name = intern(seat_match.group(2))
             stack_str = seat_match.group(3)
             is_dealer = seat_match.group(4) is not None
             
-            starting_stack = parse_decimal(stack_str) or Decimal(0)
+            starting_stack = parse_cents(stack_str) or 0
             
             players.append({
                 'screen_name': screen_name,
@@ -93,49 +201,68 @@ def parse_pokertracker_ipoker(raw_text: str) -> Dict:
                 'starting_stack': starting_stack,
                 'is_dealer': is_dealer,
             })
-    
-    if not players:
-        raise ValueError("No players found in hand")
-    
-    # Parse streets and actions
-    streets = {'preflop': None, 'flop': None, 'turn': None, 'river': None}
-    actions = []
-    current_street = 'preflop'
-    action_no = 0
-    
-    # Track pot contributions for net calculation
-    player_invested = {p['screen_name']: Decimal(0) for p in players}
-    
-    for line in lines:
-        # Street markers
-        if '*** HOLE CARDS ***' in line:
-            current_street = 'preflop'
-            continue
-        elif '*** FLOP ***' in line:
-            current_street = 'flop'
-            board_match = re.search(r'\[([^\]]+)\]', line)
-            if board_match:
-                streets['flop'] = board_match.group(1)
-            continue
-        elif '*** TURN ***' in line:
-            current_street = 'turn'
-            board_match = re.search(r'\[([^\]]+)\]', line)
-            if board_match:
-                streets['turn'] = board_match.group(1)
-            continue
-        elif '*** RIVER ***' in line:
-            current_street = 'river'
-            board_match = re.search(r'\[([^\]]+)\]', line)
-            if board_match:
-                streets['river'] = board_match.group(1)
+        
+        if not table_size_found and line_no < 10 and line.startswith("Table Size"):
+            match = _TABLE_SIZE_RE.search(line)
+            if match:
+                table_size = int(match.group(1))
+                table_size_found = True
+        
+        if in_summary:
+            if '*** SUMMARY ***' in line:
+                continue
+            
+            # Total pot €X.XX Rake €X.XX
+            if line.startswith('Total pot'):
+                pot_match = _POT_RE.search(line)
+                if pot_match:
+                    total_pot = parse_cents(pot_match.group(1)) or 0
+            
+            # <player>: wins €X.XX
+            win_match = _WIN_RE.match(line)
+            if win_match:
+                player = intern(win_match.group(1).strip())
+                won_amount = parse_cents(win_match.group(2)) or 0
+                winners.add(player)
+                # net_amount is filled in after the loop (needs the whole hand's investments)
+                results.append({
+                    'player': player,
+                    'won_amount': won_amount,
+                    'net_amount': None,
+                })
             continue
-        elif '*** SUMMARY ***' in line:
-            break
+        
+        # Street markers (all of them contain '***': one check for ordinary lines)
+        if '***' in line:
+            if '*** HOLE CARDS ***' in line:
+                current_street = _PREFLOP
+                continue
+            elif '*** FLOP ***' in line:
+                current_street = _FLOP
+                board = _board_cards(line)
+                if board:
+                    streets[_FLOP] = board
+                continue
+            elif '*** TURN ***' in line:
+                current_street = _TURN
+                board = _board_cards(line)
+                if board:
+                    streets[_TURN] = board
+                continue
+            elif '*** RIVER ***' in line:
+                current_street = _RIVER
+                board = _board_cards(line)
+                if board:
+                    streets[_RIVER] = board
+                continue
+            elif '*** SUMMARY ***' in line:
+                in_summary = True
+                continue
         
         # Parse actions: <player>: <action> [amount]
-        action_match = re.match(r'^([^:]+):\s+(.*)', line)
+        action_match = action_re_match(line)
         if action_match:
-            player = action_match.group(1).strip()
+            player = intern(action_match.group(1).strip())
             action_text = action_match.group(2).strip()
             
             # Skip non-action lines
@@ -144,112 +271,64 @@ def parse_pokertracker_ipoker(raw_text: str) -> Dict:
             
             action_no += 1
             
-            # Determine action type and amount
+            # Parse action type (one prefix lookup, then the amount once below)
             action_type = None
-            amount = Decimal(0)
-            is_allin = False
+            has_amount = False
+            for keyword, keyword_type, keyword_has_amount in keywords_for(action_text[:2], ()):
+                if action_text.startswith(keyword):
+                    action_type = keyword_type
+                    has_amount = keyword_has_amount
+                    break
+            
+            if action_type is None:
+                # Hole cards line or unknown action, skip
+                continue
             
             # Check for all-in
-            if '(NF)' in action_text or 'all-in' in action_text.lower() or 'allin' in action_text.lower():
+            is_allin = False
+            if '(NF)' in action_text:
                 is_allin = True
+            else:
+                action_text_lower = action_text.lower()
+                if 'all-in' in action_text_lower or 'allin' in action_text_lower:
+                    is_allin = True
             
-            # Parse action type
-            if action_text.startswith('Post SB'):
-                action_type = 'POST_SB'
-                amount_match = re.search(r'([€$\d.,]+)', action_text)
-                if amount_match:
-                    amount = parse_decimal(amount_match.group(1)) or Decimal(0)
-                    player_invested[player] += amount
-            elif action_text.startswith('Post BB'):
-                action_type = 'POST_BB'
-                amount_match = re.search(r'([€$\d.,]+)', action_text)
+            amount = 0
+            if has_amount:
+                amount_match = amount_re_search(action_text)
                 if amount_match:
-                    amount = parse_decimal(amount_match.group(1)) or Decimal(0)
-                    player_invested[player] += amount
-            elif action_text.startswith('Post Ante'):
-                action_type = 'POST_ANTE'
-                amount_match = re.search(r'([€$\d.,]+)', action_text)
-                if amount_match:
-                    amount = parse_decimal(amount_match.group(1)) or Decimal(0)
-                    player_invested[player] += amount
-            elif action_text.startswith('Fold'):
-                action_type = 'FOLD'
-            elif action_text.startswith('Check'):
-                action_type = 'CHECK'
-            elif action_text.startswith('Call'):
-                action_type = 'CALL'
-                amount_match = re.search(r'([€$\d.,]+)', action_text)
-                if amount_match:
-                    amount = parse_decimal(amount_match.group(1)) or Decimal(0)
-                    player_invested[player] += amount
-            elif action_text.startswith('Bet'):
-                action_type = 'BET'
-                amount_match = re.search(r'([€$\d.,]+)', action_text)
-                if amount_match:
-                    amount = parse_decimal(amount_match.group(1)) or Decimal(0)
-                    player_invested[player] += amount
-            elif action_text.startswith('Raise'):
-                action_type = 'RAISE'
-                amount_match = re.search(r'([€$\d.,]+)', action_text)
-                if amount_match:
-                    amount = parse_decimal(amount_match.group(1)) or Decimal(0)
-                    player_invested[player] += amount
-            elif action_text.startswith('Dealt to'):
-                # Skip hole cards line
-                continue
-            else:
-                # Unknown action, skip
-                continue
+                    amount = parse_cents(amount_match.group(1)) or 0
+                    invested_by_player[player] = invested_get(player, 0) + amount
             
-            if action_type:
-                actions.append({
-                    'street': current_street,
-                    'action_no': action_no,
-                    'player': player,
-                    'action_type': action_type,
-                    'amount': amount,
-                    'is_allin': is_allin,
-                })
+            append_action({
+                'street': current_street,
+                'action_no': action_no,
+                'player': player,
+                'action_type': action_type,
+                'amount': amount,
+                'is_allin': is_allin,
+            })
     
-    # Parse results from summary
-    results = []
-    in_summary = False
-    total_pot = Decimal(0)
+    if not players:
+        raise ValueError("No players found in hand")
     
-    for line in lines:
-        if '*** SUMMARY ***' in line:
-            in_summary = True
-            continue
-        
-        if in_summary:
-            # Total pot €X.XX Rake €X.XX
-            if line.startswith('Total pot'):
-                pot_match = re.search(r'Total pot\s+([€$\d.,]+)', line)
-                if pot_match:
-                    total_pot = parse_decimal(pot_match.group(1)) or Decimal(0)
-            
-            # <player>: wins €X.XX
-            win_match = re.match(r'^([^:]+):\s+wins\s+([€$\d.,]+)', line)
-            if win_match:
-                player = win_match.group(1).strip()
-                won_amount = parse_decimal(win_match.group(2)) or Decimal(0)
-                
-                invested = player_invested.get(player, Decimal(0))
-                net_amount = won_amount - invested
-                
-                results.append({
-                    'player': player,
-                    'won_amount': won_amount,
-                    'net_amount': net_amount,
-                })
+    # Investments per seated player (seat order); money put in by a name
+    # without a seat line is an error, as before
+    player_invested = {p['screen_name']: 0 for p in players}
+    for player, invested in invested_by_player.items():
+        if player not in player_invested:
+            raise KeyError(player)
+        player_invested[player] += invested
+    
+    for r in results:
+        r['net_amount'] = r['won_amount'] - player_invested.get(r['player'], 0)
     
     # Add players who didn't win (lost their investment)
-    winners = {r['player'] for r in results}
     for player, invested in player_invested.items():
         if player not in winners and invested > 0:
             results.append({
                 'player': player,
-                'won_amount': Decimal(0),
+                'won_amount': 0,
                 'net_amount': -invested,
             })
     
@@ -263,36 +342,97 @@ def parse_pokertracker_ipoker(raw_text: str) -> Dict:
     }
 
 
-def upsert_player(conn, user_id: int, screen_name: str) -> int:
-    """Get or create player, return player_id."""
+def read_hand_file(file_path) -> Tuple[str, str]:
+    """
+    Read a hand history file and hash it.
+    Returns (raw_text, raw_text_hash). The hash is sha256 of the stored text's
+    UTF-8 bytes, as before: newlines are normalized on the bytes (same as text
+    mode) and those bytes are hashed, so CRLF files keep their hash and there's
+    no second UTF-8 copy of the text just for hashing.
+    """
+    with open(file_path, 'rb') as f:
+        data = f.read()
+
+    # Same newline handling as reading the file in text mode
+    if b'\r' in data:
+        data = data.replace(b'\r\n', b'\n').replace(b'\r', b'\n')
+    raw_text = data.decode('utf-8')
+    return raw_text, hashlib.sha256(data).hexdigest()
+
+
+def read_and_parse_hand_file(file_path) -> Tuple[Optional[Dict], Optional[str]]:
+    """
+    Read + hash + parse one file. Top-level so it can run in a process pool.
+    Returns (hand, error): hand has game_id, source_file, raw_text_hash, raw_text
+    and parsed; error is the message if the file could not be read/parsed.
+    """
+    try:
+        raw_text, raw_text_hash = read_hand_file(file_path)
+        parsed = parse_pokertracker_ipoker(raw_text)
+    except Exception as e:
+        return None, str(e)
+
+    return {
+        'game_id': parsed['game_id'],
+        'source_file': str(file_path),
+        'raw_text_hash': raw_text_hash,
+        'raw_text': raw_text,
+        'parsed': parsed,
+    }, None
+
+
+def upsert_players(conn, user_id: int, screen_names: List[str]) -> Dict[str, int]:
+    """Get or create players (one multi-row statement), return {screen_name: player_id}."""
+    # de-dupe keeping order: ON CONFLICT can't touch the same row twice in one statement
+    names = list(dict.fromkeys(screen_names))
+    if not names:
+        return {}
+    values_sql = ", ".join(["(%s, %s)"] * len(names))
+    params = [x for name in names for x in (user_id, name)]
     with conn.cursor() as cur:
         cur.execute(
-            """
+            f"""
             INSERT INTO players (user_id, screen_name)
-            VALUES (%s, %s)
+            VALUES {values_sql}
             ON CONFLICT (user_id, screen_name)
             DO UPDATE SET screen_name = EXCLUDED.screen_name
-            RETURNING id
+            RETURNING id, screen_name
             """,
-            (user_id, screen_name),
+            params,
         )
-        return cur.fetchone()[0]
+        return {screen_name: pid for pid, screen_name in cur.fetchall()}
+
+
+# Whether hand_sizes exists (migration 003); looked up once per process.
+# Restart the app after applying the migration to start filling it.
+_HAND_SIZES_EXISTS: Optional[bool] = None
+
+
+def _has_hand_sizes(cur) -> bool:
+    global _HAND_SIZES_EXISTS
+    if _HAND_SIZES_EXISTS is None:
+        cur.execute("SELECT to_regclass('hand_sizes')")
+        _HAND_SIZES_EXISTS = cur.fetchone()[0] is not None
+    return _HAND_SIZES_EXISTS
 
 
 def store_parsed_hand(conn, user_id: int, hand_id: int, parsed: Dict) -> None:
-    """Store parsed hand data into database tables."""
-    
-    # Map player names to IDs
-    player_name_to_id = {}
-    for p in parsed['players']:
-        pid = upsert_player(conn, user_id, p['screen_name'])
-        player_name_to_id[p['screen_name']] = pid
+    """
+    Store parsed hand data into database tables.
+    Runs in its own transaction block (a savepoint when the caller already has a
+    transaction open): a hand that fails leaves no half-written rows behind.
+    """
+    with conn.transaction():
+        # Map player names to IDs
+        player_name_to_id = upsert_players(conn, user_id, [p['screen_name'] for p in parsed['players']])
     
-    # Insert hand_players
-    for p in parsed['players']:
-        pid = player_name_to_id[p['screen_name']]
+        # One cursor for the whole hand; one executemany (or COPY) per table instead
+        # of one execute + cursor per row. The fixed-text statements are prepared
+        # server-side (prepare=True): planned once per connection, not per hand
         with conn.cursor() as cur:
-            cur.execute(
+            # Insert hand_players (executemany runs the rows in order, so a player
+            # listed twice still just updates its own row)
+            cur.executemany(
                 """
                 INSERT INTO hand_players (hand_id, player_id, seat, starting_stack, is_dealer)
                 VALUES (%s, %s, %s, %s, %s)
@@ -302,67 +442,60 @@ def store_parsed_hand(conn, user_id: int, hand_id: int, parsed: Dict) -> None:
                     starting_stack = EXCLUDED.starting_stack,
                     is_dealer = EXCLUDED.is_dealer
                 """,
-                (hand_id, pid, p['seat'], p['starting_stack'], p['is_dealer']),
+                [
+                    (hand_id, player_name_to_id[p['screen_name']], p['seat'], cents_to_decimal(p['starting_stack']), p['is_dealer'])
+                    for p in parsed['players']
+                ],
             )
-    
-    # Insert streets
-    for street, board in parsed['streets'].items():
-        with conn.cursor() as cur:
-            cur.execute(
+        
+            # Insert streets
+            cur.executemany(
                 """
                 INSERT INTO streets (hand_id, street, board)
                 VALUES (%s, %s, %s)
                 ON CONFLICT (hand_id, street)
                 DO UPDATE SET board = EXCLUDED.board
                 """,
-                (hand_id, street, board),
+                [(hand_id, street, board) for street, board in parsed['streets'].items()],
             )
-    
-    # Delete old actions and insert new ones
-    with conn.cursor() as cur:
-        cur.execute("DELETE FROM actions WHERE hand_id = %s", (hand_id,))
         
-        for a in parsed['actions']:
-            pid = player_name_to_id.get(a['player'])
-            if not pid:
-                continue
-            
-            cur.execute(
-                """
-                INSERT INTO actions (hand_id, street, action_no, player_id, action_type, amount, is_allin)
-                VALUES (%s, %s, %s, %s, %s, %s, %s)
-                """,
-                (hand_id, a['street'], a['action_no'], pid, a['action_type'], a['amount'], a['is_allin']),
-            )
-    
-    # Insert hand_results
-    with conn.cursor() as cur:
-        cur.execute("DELETE FROM hand_results WHERE hand_id = %s", (hand_id,))
+            # Delete old actions and insert new ones (COPY: the biggest table of the hand)
+            cur.execute("DELETE FROM actions WHERE hand_id = %s", (hand_id,), prepare=True)
+            with cur.copy(
+                "COPY actions (hand_id, street, action_no, player_id, action_type, amount, is_allin) FROM STDIN"
+            ) as copy:
+                for a in parsed['actions']:
+                    pid = player_name_to_id.get(a['player'])
+                    if not pid:
+                        continue
+                    copy.write_row((hand_id, a['street'], a['action_no'], pid, a['action_type'], cents_to_decimal(a['amount']), a['is_allin']))
         
-        for r in parsed['results']:
-            pid = player_name_to_id.get(r['player'])
-            if not pid:
-                continue
-            
-            cur.execute(
-                """
-                INSERT INTO hand_results (hand_id, player_id, won_amount, net_amount)
-                VALUES (%s, %s, %s, %s)
-                """,
-                (hand_id, pid, r['won_amount'], r['net_amount']),
-            )
-    
-    # Insert hand_sizes if table exists
-    try:
-        with conn.cursor() as cur:
-            cur.execute(
-                """
-                INSERT INTO hand_sizes (hand_id, player_count)
-                VALUES (%s, %s)
-                ON CONFLICT (hand_id) DO UPDATE SET player_count = EXCLUDED.player_count
-                """,
-                (hand_id, parsed['table_size']),
-            )
-    except Exception:
-        # Table might not exist in older schemas, ignore
-        pass
+            # Insert hand_results
+            cur.execute("DELETE FROM hand_results WHERE hand_id = %s", (hand_id,), prepare=True)
+            result_rows = []
+            for r in parsed['results']:
+                pid = player_name_to_id.get(r['player'])
+                if not pid:
+                    continue
+                result_rows.append((hand_id, pid, cents_to_decimal(r['won_amount']), cents_to_decimal(r['net_amount'])))
+            if result_rows:
+                cur.executemany(
+                    """
+                    INSERT INTO hand_results (hand_id, player_id, won_amount, net_amount)
+                    VALUES (%s, %s, %s, %s)
+                    """,
+                    result_rows,
+                )
+        
+            # Insert hand_sizes if table exists (older schemas may not have it;
+            # checked once instead of a failing INSERT + savepoint per hand)
+            if _has_hand_sizes(cur):
+                cur.execute(
+                    """
+                    INSERT INTO hand_sizes (hand_id, player_count)
+                    VALUES (%s, %s)
+                    ON CONFLICT (hand_id) DO UPDATE SET player_count = EXCLUDED.player_count
+                    """,
+                    (hand_id, parsed['table_size']),
+                    prepare=True,
+                )
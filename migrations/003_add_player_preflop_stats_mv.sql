@@ -0,0 +1,50 @@
+-- =============================================
+-- MIGRATION: 003_add_player_preflop_stats_mv.sql
+-- Description: Precompute per-player preflop stats (VPIP / PFR) for /ui/players
+-- Date: 2026-10-15
+-- Author: yvolo_tracker project
+-- =============================================
+
+-- PURPOSE:
+-- /ui/players used to aggregate VPIP / PFR from raw actions on every request.
+-- This materialized view stores the counters per (user_id, player_id, player_count)
+-- so the page only needs a small index lookup per player.
+--
+-- The view is refreshed by the app at the end of each PokerTracker import
+-- (REFRESH MATERIALIZED VIEW CONCURRENTLY, which requires the UNIQUE index below).
+
+-- =============================================
+-- PREREQUISITE: hand_sizes
+-- =============================================
+-- hand_sizes is populated by store_parsed_hand(); older databases may not have it yet.
+CREATE TABLE IF NOT EXISTS hand_sizes (
+    hand_id BIGINT PRIMARY KEY REFERENCES hands(id) ON DELETE CASCADE,
+    player_count INT NOT NULL
+);
+
+-- =============================================
+-- MATERIALIZED VIEW
+-- =============================================
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_player_preflop_stats AS
+SELECT
+    h.user_id,
+    a.player_id,
+    hs.player_count,
+    COUNT(DISTINCT a.hand_id) AS hands,
+    COUNT(DISTINCT a.hand_id) FILTER (WHERE a.action_type IN ('CALL', 'BET', 'RAISE', 'ALLIN')) AS vpip_hands,
+    COUNT(DISTINCT a.hand_id) FILTER (WHERE a.action_type IN ('BET', 'RAISE', 'ALLIN')) AS pfr_hands
+FROM actions a
+JOIN hands h ON a.hand_id = h.id
+JOIN hand_sizes hs ON hs.hand_id = a.hand_id
+WHERE a.street = 'preflop'
+  AND hs.player_count IN (2, 3)
+GROUP BY h.user_id, a.player_id, hs.player_count;
+
+-- Required by REFRESH ... CONCURRENTLY, and serves the per-player lookups
+CREATE UNIQUE INDEX IF NOT EXISTS idx_mv_player_preflop_stats_key
+ON mv_player_preflop_stats(user_id, player_id, player_count);
+
+-- =============================================
+-- MANUAL REFRESH
+-- =============================================
+-- REFRESH MATERIALIZED VIEW CONCURRENTLY mv_player_preflop_stats;
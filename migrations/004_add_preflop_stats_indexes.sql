@@ -0,0 +1,59 @@
+-- =============================================
+-- MIGRATION: 004_add_preflop_stats_indexes.sql
+-- Description: Indexes for the preflop stats aggregation (VPIP / PFR)
+-- Date: 2026-10-15
+-- Author: yvolo_tracker project
+-- =============================================
+
+-- PURPOSE:
+-- The preflop stats aggregation (mv_player_preflop_stats refresh, see 003) filters
+--   hands.user_id = X AND actions.street = 'preflop' AND hand_sizes.player_count IN (2, 3)
+-- and joins actions -> hands -> hand_sizes on hand_id. Without these indexes the
+-- planner falls back to a sequential scan of actions.
+
+-- =============================================
+-- ACTIONS: partial index on preflop rows only
+-- =============================================
+-- Only preflop actions are aggregated; the partial index is 3-4x smaller than a
+-- full one and covers (hand_id, player_id, action_type) for index-only scans.
+CREATE INDEX IF NOT EXISTS idx_actions_preflop
+ON actions(hand_id, player_id, action_type)
+WHERE street = 'preflop';
+
+-- =============================================
+-- HANDS: user filter + join key
+-- =============================================
+CREATE INDEX IF NOT EXISTS idx_hands_user
+ON hands(user_id, id);
+
+-- =============================================
+-- HAND_SIZES: join key + player_count filter
+-- =============================================
+CREATE INDEX IF NOT EXISTS idx_hand_sizes_hand
+ON hand_sizes(hand_id, player_count);
+
+-- =============================================
+-- PLAYERS: screen_name search per user
+-- =============================================
+-- text_pattern_ops supports prefix searches (screen_name LIKE 'abc%') combined
+-- with the user_id filter.
+CREATE INDEX IF NOT EXISTS idx_players_user_screen
+ON players(user_id, screen_name text_pattern_ops);
+
+-- =============================================
+-- STATISTICS
+-- =============================================
+-- Refresh planner statistics so the new indexes are picked up right away
+ANALYZE actions;
+ANALYZE hands;
+ANALYZE hand_sizes;
+ANALYZE players;
+
+-- =============================================
+-- VERIFICATION QUERY
+-- =============================================
+-- SELECT tablename, indexname, indexdef
+-- FROM pg_indexes
+-- WHERE schemaname = 'public'
+--   AND indexname IN ('idx_actions_preflop', 'idx_hands_user', 'idx_hand_sizes_hand', 'idx_players_user_screen')
+-- ORDER BY tablename, indexname;
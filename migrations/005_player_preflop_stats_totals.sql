@@ -0,0 +1,65 @@
+-- =============================================
+-- MIGRATION: 005_player_preflop_stats_totals.sql
+-- Description: One row per player in mv_player_preflop_stats, with an indexed hands_total
+-- Date: 2026-10-15
+-- Author: yvolo_tracker project
+-- =============================================
+
+-- PURPOSE:
+-- /ui/players orders players by total hands (3-handed + heads-up) and shows 200 per page.
+-- With one MV row per (user_id, player_id, player_count) the page had to join the view
+-- twice and sort every qualifying player by an expression on each request.
+--
+-- This migration recreates the view with one row per (user_id, player_id) and the
+-- 3H / HU counters side by side, plus a stored hands_total. The index on
+-- (user_id, hands_total DESC, player_id DESC) lets the page read the top rows straight
+-- from the index, and the next pages use keyset pagination:
+--   WHERE user_id = X AND (hands_total, player_id) < (last_total, last_id)
+--   ORDER BY hands_total DESC, player_id DESC LIMIT 200
+
+-- =============================================
+-- MATERIALIZED VIEW (replaces 003)
+-- =============================================
+DROP MATERIALIZED VIEW IF EXISTS mv_player_preflop_stats;
+
+CREATE MATERIALIZED VIEW mv_player_preflop_stats AS
+WITH per_size AS (
+    SELECT
+        h.user_id,
+        a.player_id,
+        hs.player_count,
+        COUNT(DISTINCT a.hand_id) AS hands,
+        COUNT(DISTINCT a.hand_id) FILTER (WHERE a.action_type IN ('CALL', 'BET', 'RAISE', 'ALLIN')) AS vpip_hands,
+        COUNT(DISTINCT a.hand_id) FILTER (WHERE a.action_type IN ('BET', 'RAISE', 'ALLIN')) AS pfr_hands
+    FROM actions a
+    JOIN hands h ON a.hand_id = h.id
+    JOIN hand_sizes hs ON hs.hand_id = a.hand_id
+    WHERE a.street = 'preflop'
+      AND hs.player_count IN (2, 3)
+    GROUP BY h.user_id, a.player_id, hs.player_count
+)
+SELECT
+    user_id,
+    player_id,
+    COALESCE(MAX(hands) FILTER (WHERE player_count = 3), 0) AS hands_3h,
+    COALESCE(MAX(vpip_hands) FILTER (WHERE player_count = 3), 0) AS vpip_3h_hands,
+    COALESCE(MAX(pfr_hands) FILTER (WHERE player_count = 3), 0) AS pfr_3h_hands,
+    COALESCE(MAX(hands) FILTER (WHERE player_count = 2), 0) AS hands_hu,
+    COALESCE(MAX(vpip_hands) FILTER (WHERE player_count = 2), 0) AS vpip_hu_hands,
+    COALESCE(MAX(pfr_hands) FILTER (WHERE player_count = 2), 0) AS pfr_hu_hands,
+    SUM(hands)::BIGINT AS hands_total
+FROM per_size
+GROUP BY user_id, player_id;
+
+-- Required by REFRESH ... CONCURRENTLY
+CREATE UNIQUE INDEX IF NOT EXISTS idx_mv_player_preflop_stats_key
+ON mv_player_preflop_stats(user_id, player_id);
+
+-- Page order + keyset pagination
+CREATE INDEX IF NOT EXISTS idx_mv_player_preflop_stats_total
+ON mv_player_preflop_stats(user_id, hands_total DESC, player_id DESC);
+
+-- =============================================
+-- MANUAL REFRESH
+-- =============================================
+-- REFRESH MATERIALIZED VIEW CONCURRENTLY mv_player_preflop_stats;
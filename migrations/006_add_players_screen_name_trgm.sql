@@ -0,0 +1,34 @@
+-- =============================================
+-- MIGRATION: 006_add_players_screen_name_trgm.sql
+-- Description: Trigram index for the /ui/players screen_name search
+-- Date: 2026-10-15
+-- Author: yvolo_tracker project
+-- =============================================
+
+-- PURPOSE:
+-- The players search uses screen_name ILIKE '%q%'. A leading wildcard can't use the
+-- b-tree index from 004 (text_pattern_ops only helps prefix searches), so every search
+-- scanned all players. pg_trgm GIN indexes support LIKE / ILIKE with leading wildcards,
+-- and the existing query picks the index up as is (bitmap index scan).
+--
+-- Note: search terms shorter than 3 characters don't produce trigrams; those
+-- still fall back to scanning the user's players.
+
+-- =============================================
+-- EXTENSION
+-- =============================================
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- =============================================
+-- PLAYERS: trigram index on screen_name
+-- =============================================
+CREATE INDEX IF NOT EXISTS idx_players_screen_trgm
+ON players USING gin (screen_name gin_trgm_ops);
+
+ANALYZE players;
+
+-- =============================================
+-- VERIFICATION QUERY
+-- =============================================
+-- EXPLAIN SELECT id FROM players WHERE screen_name ILIKE '%abc%';
+-- Expected: Bitmap Index Scan on idx_players_screen_trgm
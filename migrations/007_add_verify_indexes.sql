@@ -0,0 +1,60 @@
+-- =============================================
+-- MIGRATION: 007_add_verify_indexes.sql
+-- Description: Covering indexes for the parsed-data verification queries
+-- Date: 2026-10-15
+-- Author: yvolo_tracker project
+-- =============================================
+
+-- PURPOSE:
+-- scripts/verify_parsed_data_v1.py (and the smoke test) filter hands by user_id and
+-- read the child tables by hand_id. Most of that is already indexed:
+--   hands:        idx_hands_user (user_id, id) from 004, idx_hands_user_game_id
+--   hand_players: idx_hand_players_hand_id
+--   actions:      idx_actions_hand_id, idx_actions_hand_action_no (MIN/MAX action_no)
+--   streets:      UNIQUE(hand_id, street)
+-- What is left are the columns the checks read from the heap:
+--   - the quality checks read actions.player_id (orphans) and actions.street
+--     (invalid values) for every action of the user;
+--   - the sample lists streets WHERE board IS NOT NULL per hand.
+-- The indexes below cover them so both run as index-only scans.
+
+-- =============================================
+-- ACTIONS: hand_id + columns read by the quality checks
+-- =============================================
+CREATE INDEX IF NOT EXISTS idx_actions_hand_checks
+ON actions(hand_id) INCLUDE (player_id, street);
+
+-- =============================================
+-- STREETS: partial index on streets with a board
+-- =============================================
+-- Matches the "board IS NOT NULL" predicate of the sample query; preflop rows
+-- (no board) are left out of the index.
+CREATE INDEX IF NOT EXISTS idx_streets_hand_board
+ON streets(hand_id, street)
+WHERE board IS NOT NULL;
+
+-- =============================================
+-- STATISTICS
+-- =============================================
+ANALYZE actions;
+ANALYZE streets;
+
+-- =============================================
+-- ALTERNATIVE: CONCURRENT INDEX CREATION
+-- =============================================
+-- actions is the largest table: on a live database build the index without
+-- blocking writes. CONCURRENTLY cannot run inside a transaction, so execute
+-- each statement on its own:
+-- CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_actions_hand_checks
+-- ON actions(hand_id) INCLUDE (player_id, street);
+-- CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_streets_hand_board
+-- ON streets(hand_id, street) WHERE board IS NOT NULL;
+
+-- =============================================
+-- VERIFICATION QUERY
+-- =============================================
+-- SELECT tablename, indexname, indexdef
+-- FROM pg_indexes
+-- WHERE schemaname = 'public'
+--   AND indexname IN ('idx_actions_hand_checks', 'idx_streets_hand_board')
+-- ORDER BY tablename, indexname;
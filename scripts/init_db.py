@@ -16,10 +16,10 @@ def init_db():
     if not database_url:
         raise ValueError("DATABASE_URL not found in environment")
     
-    # Read schema file
+    # Read schema file as bytes: psycopg sends them as they are (UTF-8 file),
+    # no decode here just to encode it again for the server
     schema_path = Path(__file__).parent.parent / "db" / "schema.sql"
-    with open(schema_path, "r", encoding="utf-8") as f:
-        schema_sql = f.read()
+    schema_sql = schema_path.read_bytes()
     
     # Connect and execute schema
     with psycopg.connect(database_url) as conn:
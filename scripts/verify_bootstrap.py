@@ -7,28 +7,19 @@ import sys
 from dotenv import load_dotenv
 import psycopg
 
-def check_table_exists(cur, table_name):
-    """Check if a table exists in the database."""
+def fetch_table_columns(cur, table_names):
+    """
+    Columns of the given tables in one catalog query: {table_name: set(columns)}.
+    A table missing from the result does not exist.
+    """
     cur.execute("""
-        SELECT EXISTS (
-            SELECT FROM information_schema.tables 
-            WHERE table_schema = 'public' 
-            AND table_name = %s
-        );
-    """, (table_name,))
-    return cur.fetchone()[0]
-
-def check_columns_exist(cur, table_name, columns):
-    """Check if specific columns exist in a table."""
-    cur.execute("""
-        SELECT column_name 
+        SELECT table_name, array_agg(column_name::text)
         FROM information_schema.columns 
         WHERE table_schema = 'public' 
-        AND table_name = %s
-        AND column_name = ANY(%s);
-    """, (table_name, columns))
-    found_columns = [row[0] for row in cur.fetchall()]
-    return all(col in found_columns for col in columns)
+        AND table_name = ANY(%s)
+        GROUP BY table_name;
+    """, (list(table_names),))
+    return {table_name: set(columns) for table_name, columns in cur.fetchall()}
 
 def check_unique_constraint(cur, table_name, columns):
     """Check if a UNIQUE constraint exists on specific columns."""
@@ -66,20 +57,23 @@ def main():
             print("[OK] Connected to database")
             
             with conn.cursor() as cur:
+                # Tables + columns, one round trip
+                table_columns = fetch_table_columns(cur, ["users", "hands"])
+                
                 # Check tables exist
-                if not check_table_exists(cur, "users"):
+                if "users" not in table_columns:
                     print("[ERROR] Table users does not exist")
                     sys.exit(1)
                 print("[OK] Table users exists")
                 
-                if not check_table_exists(cur, "hands"):
+                if "hands" not in table_columns:
                     print("[ERROR] Table hands does not exist")
                     sys.exit(1)
                 print("[OK] Table hands exists")
                 
                 # Check required columns in hands table
                 required_columns = ["id", "user_id", "game_id", "raw_text"]
-                if not check_columns_exist(cur, "hands", required_columns):
+                if not table_columns["hands"].issuperset(required_columns):
                     print("[ERROR] hands table missing required columns")
                     sys.exit(1)
                 print("[OK] hands has required columns")
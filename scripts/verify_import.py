@@ -31,31 +31,22 @@ def verify_import(database_url: str, username: str):
             sys.exit(1)
         
         with conn.cursor() as cur:
-            # A) Count total hands
-            cur.execute(
-                "SELECT COUNT(*) FROM hands WHERE user_id = %s",
-                (user_id,)
-            )
-            total_hands = cur.fetchone()[0]
-            
-            # A) Count unique game_ids
-            cur.execute(
-                "SELECT COUNT(DISTINCT game_id) FROM hands WHERE user_id = %s",
-                (user_id,)
-            )
-            unique_game_ids = cur.fetchone()[0]
-            
-            # B) Check for duplicate game_ids (should be 0 due to UNIQUE constraint)
+            # A) Total hands + unique game_ids, and
+            # B) duplicate game_id groups (should be 0 due to UNIQUE constraint),
+            # all from one scan of the user's hands grouped by game_id
             cur.execute("""
-                SELECT COUNT(*) FROM (
+                SELECT
+                    COALESCE(SUM(c), 0) AS total_hands,
+                    COUNT(*) AS unique_game_ids,
+                    COUNT(*) FILTER (WHERE c > 1) AS duplicate_groups
+                FROM (
                     SELECT game_id, COUNT(*) c
                     FROM hands
                     WHERE user_id = %s
                     GROUP BY game_id
-                    HAVING COUNT(*) > 1
                 ) t
             """, (user_id,))
-            duplicate_groups = cur.fetchone()[0]
+            total_hands, unique_game_ids, duplicate_groups = cur.fetchone()
             
             # C) Top 10 source_file by number of hands
             cur.execute("""
@@ -68,15 +59,26 @@ def verify_import(database_url: str, username: str):
             """, (user_id,))
             top_sources = cur.fetchall()
             
-            # D) Random samples
+            # D) Random samples: shuffle a 0.1% page sample instead of sorting
+            # every hand of the user by random()
             cur.execute("""
-                SELECT id, game_id, source_file, substring(raw_text from 1 for 200) AS raw_preview
-                FROM hands
+                SELECT id, game_id, source_file, left(raw_text, 200) AS raw_preview
+                FROM hands TABLESAMPLE SYSTEM (0.1)
                 WHERE user_id = %s
                 ORDER BY random()
                 LIMIT 3
             """, (user_id,))
             samples = cur.fetchall()
+            if len(samples) < 3:
+                # Sample missed (small table / user): the full shuffle is cheap here
+                cur.execute("""
+                    SELECT id, game_id, source_file, left(raw_text, 200) AS raw_preview
+                    FROM hands
+                    WHERE user_id = %s
+                    ORDER BY random()
+                    LIMIT 3
+                """, (user_id,))
+                samples = cur.fetchall()
         
         # Print report
         print("=" * 40)
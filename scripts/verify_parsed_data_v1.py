@@ -21,122 +21,145 @@ def get_user_id(conn, username: str) -> int:
 
 def get_global_counts(conn, user_id: int) -> dict:
     """Get global counts for the user."""
-    counts = {}
-    
     with conn.cursor() as cur:
-        # Total hands
-        cur.execute("SELECT COUNT(*) FROM hands WHERE user_id = %s", (user_id,))
-        counts['total_hands'] = cur.fetchone()[0]
-        
-        # Total players
-        cur.execute("SELECT COUNT(*) FROM players WHERE user_id = %s", (user_id,))
-        counts['total_players'] = cur.fetchone()[0]
-        
-        # Total hand_players (only for this user's hands)
-        cur.execute("""
-            SELECT COUNT(*) 
-            FROM hand_players hp
-            JOIN hands h ON h.id = hp.hand_id
-            WHERE h.user_id = %s
-        """, (user_id,))
-        counts['total_hand_players'] = cur.fetchone()[0]
-        
-        # Total actions (only for this user's hands)
-        cur.execute("""
-            SELECT COUNT(*) 
-            FROM actions a
-            JOIN hands h ON h.id = a.hand_id
-            WHERE h.user_id = %s
-        """, (user_id,))
-        counts['total_actions'] = cur.fetchone()[0]
-        
-        # Total streets (only for this user's hands)
+        # All five counts in one statement (one round trip); hand_players,
+        # actions and streets only for this user's hands
         cur.execute("""
-            SELECT COUNT(*) 
-            FROM streets s
-            JOIN hands h ON h.id = s.hand_id
-            WHERE h.user_id = %s
-        """, (user_id,))
-        counts['total_streets'] = cur.fetchone()[0]
+            SELECT
+                (SELECT COUNT(*) FROM hands WHERE user_id = %(user_id)s),
+                (SELECT COUNT(*) FROM players WHERE user_id = %(user_id)s),
+                (SELECT COUNT(*)
+                 FROM hand_players hp
+                 JOIN hands h ON h.id = hp.hand_id
+                 WHERE h.user_id = %(user_id)s),
+                (SELECT COUNT(*)
+                 FROM actions a
+                 JOIN hands h ON h.id = a.hand_id
+                 WHERE h.user_id = %(user_id)s),
+                (SELECT COUNT(*)
+                 FROM streets s
+                 JOIN hands h ON h.id = s.hand_id
+                 WHERE h.user_id = %(user_id)s)
+        """, {"user_id": user_id})
+        row = cur.fetchone()
     
+    counts = dict(zip(
+        ('total_hands', 'total_players', 'total_hand_players', 'total_actions', 'total_streets'),
+        row,
+    ))
     return counts
 
 
 def check_quality_issues(conn, user_id: int) -> dict:
     """Check for various quality issues."""
-    issues = {}
-    
     with conn.cursor() as cur:
-        # Hands without hand_players
-        cur.execute("""
-            SELECT COUNT(DISTINCT h.id)
-            FROM hands h
-            LEFT JOIN hand_players hp ON hp.hand_id = h.id
-            WHERE h.user_id = %s
-            GROUP BY h.id
-            HAVING COUNT(hp.id) = 0
-        """, (user_id,))
-        result = cur.fetchall()
-        issues['hands_without_players'] = len(result)
-        
-        # Hands without actions
-        cur.execute("""
-            SELECT COUNT(DISTINCT h.id)
-            FROM hands h
-            LEFT JOIN actions a ON a.hand_id = h.id
-            WHERE h.user_id = %s
-            GROUP BY h.id
-            HAVING COUNT(a.id) = 0
-        """, (user_id,))
-        result = cur.fetchall()
-        issues['hands_without_actions'] = len(result)
-        
-        # Orphan actions (actions with player_id not belonging to user's players)
-        cur.execute("""
-            SELECT COUNT(*)
-            FROM actions a
-            JOIN hands h ON h.id = a.hand_id
-            WHERE h.user_id = %s
-            AND a.player_id NOT IN (
-                SELECT id FROM players WHERE user_id = %s
-            )
-        """, (user_id, user_id))
-        issues['orphan_actions'] = cur.fetchone()[0]
-        
-        # Invalid street values
+        # One statement, one pass per table: the hand checks aggregate over the
+        # user's hands, the action checks over their actions (FILTER per check)
         cur.execute("""
-            SELECT COUNT(*)
-            FROM actions a
-            JOIN hands h ON h.id = a.hand_id
-            WHERE h.user_id = %s
-            AND a.street NOT IN ('preflop', 'flop', 'turn', 'river')
-        """, (user_id,))
-        issues['invalid_streets'] = cur.fetchone()[0]
+            SELECT hc.no_players, hc.no_actions, ac.orphans, ac.bad_streets
+            FROM (
+                -- Hands without hand_players / actions (anti-joins on the hand_id indexes)
+                SELECT
+                    COUNT(*) FILTER (WHERE NOT EXISTS (
+                        SELECT 1 FROM hand_players hp WHERE hp.hand_id = h.id
+                    )) AS no_players,
+                    COUNT(*) FILTER (WHERE NOT EXISTS (
+                        SELECT 1 FROM actions a WHERE a.hand_id = h.id
+                    )) AS no_actions
+                FROM hands h
+                WHERE h.user_id = %(user_id)s
+            ) hc
+            CROSS JOIN (
+                -- Orphan actions (player_id not among the user's players; the
+                -- LEFT JOIN on players' PK matches at most one row) and invalid
+                -- street values
+                SELECT
+                    COUNT(*) FILTER (WHERE p.id IS NULL) AS orphans,
+                    COUNT(*) FILTER (
+                        WHERE a.street NOT IN ('preflop', 'flop', 'turn', 'river')
+                    ) AS bad_streets
+                FROM actions a
+                JOIN hands h ON h.id = a.hand_id
+                LEFT JOIN players p ON p.id = a.player_id AND p.user_id = %(user_id)s
+                WHERE h.user_id = %(user_id)s
+            ) ac
+        """, {"user_id": user_id})
+        row = cur.fetchone()
     
+    issues = dict(zip(
+        ('hands_without_players', 'hands_without_actions', 'orphan_actions', 'invalid_streets'),
+        row,
+    ))
     return issues
 
 
+def sample_hand_ids(cur, user_id: int, sample_size: int) -> list:
+    """
+    Random ids of the user's hands: shuffle a 1% page sample instead of sorting
+    every hand by random(); only when the sample comes up short (small table /
+    user) shuffle all of the user's ids.
+    """
+    cur.execute("""
+        SELECT id
+        FROM hands TABLESAMPLE SYSTEM (1)
+        WHERE user_id = %s
+        ORDER BY random()
+        LIMIT %s
+    """, (user_id, sample_size))
+    ids = [row[0] for row in cur.fetchall()]
+    if len(ids) < sample_size:
+        cur.execute("""
+            SELECT id
+            FROM hands
+            WHERE user_id = %s
+            ORDER BY random()
+            LIMIT %s
+        """, (user_id, sample_size))
+        ids = [row[0] for row in cur.fetchall()]
+    return ids
+
+
 def get_sample_hands(conn, user_id: int, sample_size: int) -> list:
     """Get sample hands with detailed info."""
     with conn.cursor() as cur:
+        # Pick the hands first, then look up only those
+        hand_ids = sample_hand_ids(cur, user_id, sample_size)
+        if not hand_ids:
+            return []
+        
+        # One LATERAL aggregate per child table (each an index lookup on
+        # hand_id): no players x actions x streets join product to de-duplicate
         cur.execute("""
             SELECT 
                 h.id,
                 h.game_id,
-                COUNT(DISTINCT hp.id) as player_count,
-                COUNT(DISTINCT a.id) as action_count,
-                MIN(a.action_no) as first_action_no,
-                MAX(a.action_no) as last_action_no,
-                STRING_AGG(DISTINCT s.street, ',' ORDER BY s.street) as streets_present
+                hp.player_count,
+                a.action_count,
+                a.first_action_no,
+                a.last_action_no,
+                s.streets_present
             FROM hands h
-            LEFT JOIN hand_players hp ON hp.hand_id = h.id
-            LEFT JOIN actions a ON a.hand_id = h.id
-            LEFT JOIN streets s ON s.hand_id = h.id AND s.board IS NOT NULL
-            WHERE h.user_id = %s
-            GROUP BY h.id, h.game_id
+            CROSS JOIN LATERAL (
+                SELECT COUNT(*) as player_count
+                FROM hand_players
+                WHERE hand_id = h.id
+            ) hp
+            CROSS JOIN LATERAL (
+                SELECT
+                    COUNT(*) as action_count,
+                    MIN(action_no) as first_action_no,
+                    MAX(action_no) as last_action_no
+                FROM actions
+                WHERE hand_id = h.id
+            ) a
+            CROSS JOIN LATERAL (
+                SELECT STRING_AGG(DISTINCT street, ',' ORDER BY street) as streets_present
+                FROM streets
+                WHERE hand_id = h.id AND board IS NOT NULL
+            ) s
+            WHERE h.id = ANY(%s)
             ORDER BY random()
-            LIMIT %s
-        """, (user_id, sample_size))
+        """, (hand_ids,))
         
         return cur.fetchall()
 
@@ -8,54 +8,51 @@ from dotenv import load_dotenv
 import psycopg
 
 
-def check_table_exists(cur, table_name):
-    """Check if a table exists in the database."""
+def fetch_existing_tables(cur, table_names):
+    """Return the set of table_names that exist in the database (one catalog query)."""
     cur.execute("""
-        SELECT EXISTS (
-            SELECT FROM information_schema.tables 
-            WHERE table_schema = 'public' 
-            AND table_name = %s
-        );
-    """, (table_name,))
-    return cur.fetchone()[0]
+        SELECT table_name
+        FROM information_schema.tables 
+        WHERE table_schema = 'public' 
+        AND table_name = ANY(%s);
+    """, (list(table_names),))
+    return {row[0] for row in cur.fetchall()}
 
 
-def check_columns_exist(cur, table_name, columns):
-    """Check if specific columns exist in a table."""
+def fetch_table_columns(cur, table_names):
+    """Columns of the given tables in one catalog query: {table_name: set(columns)}."""
     cur.execute("""
-        SELECT column_name 
+        SELECT table_name, column_name::text
         FROM information_schema.columns 
         WHERE table_schema = 'public' 
-        AND table_name = %s
-        AND column_name = ANY(%s);
-    """, (table_name, columns))
-    found_columns = {row[0] for row in cur.fetchall()}
-    return all(col in found_columns for col in columns)
+        AND table_name = ANY(%s);
+    """, (list(table_names),))
+    table_columns = {}
+    for table_name, column_name in cur.fetchall():
+        table_columns.setdefault(table_name, set()).add(column_name)
+    return table_columns
 
 
-def check_unique_constraint_on_columns(cur, table_name, columns):
-    """Check if a UNIQUE constraint exists on specific columns."""
-    # Get all unique constraints for the table
+def fetch_unique_constraints(cur, table_names):
+    """
+    UNIQUE constraints of the given tables in one catalog query:
+    {table_name: [sorted column list per constraint]}.
+    """
     cur.execute("""
-        SELECT tc.constraint_name, array_agg(ccu.column_name ORDER BY ccu.column_name) as columns
+        SELECT tc.table_name, array_agg(ccu.column_name::text ORDER BY ccu.column_name) as columns
         FROM information_schema.table_constraints tc
         JOIN information_schema.constraint_column_usage ccu 
             ON tc.constraint_name = ccu.constraint_name
             AND tc.table_schema = ccu.table_schema
         WHERE tc.table_schema = 'public'
-        AND tc.table_name = %s
+        AND tc.table_name = ANY(%s)
         AND tc.constraint_type = 'UNIQUE'
-        GROUP BY tc.constraint_name
-    """, (table_name,))
-    
-    constraints = cur.fetchall()
-    target_columns = sorted(columns)
-    
-    for constraint_name, constraint_columns in constraints:
-        if sorted(constraint_columns) == target_columns:
-            return True
-    
-    return False
+        GROUP BY tc.table_name, tc.constraint_name
+    """, (list(table_names),))
+    constraints = {}
+    for table_name, constraint_columns in cur.fetchall():
+        constraints.setdefault(table_name, []).append(sorted(constraint_columns))
+    return constraints
 
 
 def main():
@@ -85,10 +82,24 @@ def main():
                     'hand_results': ['id', 'hand_id', 'player_id', 'won_amount', 'net_amount']
                 }
                 
+                unique_constraints = {
+                    'players': ['user_id', 'screen_name'],
+                    'hand_players': ['hand_id', 'player_id'],
+                    'streets': ['hand_id', 'street'],
+                    'hand_results': ['hand_id', 'player_id']
+                }
+                
+                # Three catalog queries in total (tables, columns, UNIQUE
+                # constraints); the checks below only compare in Python
+                table_names = tables_to_check.keys() | unique_constraints.keys()
+                existing_tables = fetch_existing_tables(cur, table_names)
+                table_columns = fetch_table_columns(cur, table_names)
+                table_uniques = fetch_unique_constraints(cur, table_names)
+                
                 # 1) Check tables exist
                 print("Checking tables existence...")
                 for table_name in tables_to_check.keys():
-                    exists = check_table_exists(cur, table_name)
+                    exists = table_name in existing_tables
                     status = "[OK]" if exists else "[FAIL]"
                     print(f"  {status} Table '{table_name}' exists")
                     if not exists:
@@ -100,8 +111,8 @@ def main():
                 print("Checking required columns...")
                 for table_name, columns in tables_to_check.items():
                     # Only check columns if table exists
-                    if check_table_exists(cur, table_name):
-                        has_columns = check_columns_exist(cur, table_name, columns)
+                    if table_name in existing_tables:
+                        has_columns = set(columns) <= table_columns.get(table_name, set())
                         status = "[OK]" if has_columns else "[FAIL]"
                         columns_str = ", ".join(columns)
                         print(f"  {status} Table '{table_name}' has columns: {columns_str}")
@@ -115,17 +126,10 @@ def main():
                 
                 # 3) Check UNIQUE constraints
                 print("Checking UNIQUE constraints...")
-                unique_constraints = {
-                    'players': ['user_id', 'screen_name'],
-                    'hand_players': ['hand_id', 'player_id'],
-                    'streets': ['hand_id', 'street'],
-                    'hand_results': ['hand_id', 'player_id']
-                }
-                
                 for table_name, columns in unique_constraints.items():
                     # Only check constraints if table exists
-                    if check_table_exists(cur, table_name):
-                        has_constraint = check_unique_constraint_on_columns(cur, table_name, columns)
+                    if table_name in existing_tables:
+                        has_constraint = sorted(columns) in table_uniques.get(table_name, [])
                         status = "[OK]" if has_constraint else "[FAIL]"
                         columns_str = ", ".join(columns)
                         print(f"  {status} UNIQUE({columns_str}) on '{table_name}'")
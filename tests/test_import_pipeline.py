@@ -21,7 +21,7 @@ PROJECT_ROOT = Path(__file__).parent.parent
 sys.path.insert(0, str(PROJECT_ROOT))
 
 from dotenv import load_dotenv
-import psycopg2
+import psycopg
 
 from core.parse_hands_incremental import parse_specific_hands, verify_imported_hands
 import xml.etree.ElementTree as ET
@@ -38,7 +38,7 @@ def get_db_conn():
     dsn = os.getenv("DATABASE_URL")
     if not dsn:
         raise RuntimeError("DATABASE_URL not defined in .env")
-    return psycopg2.connect(dsn)
+    return psycopg.connect(dsn)
 
 
 def test_per_file_import_pipeline():
@@ -88,133 +88,107 @@ def test_per_file_import_pipeline():
         duplicate_count = 0
         
         try:
-            # Read XML file
-            with open(test_file, 'r', encoding='utf-8') as f:
-                xml_content = f.read()
-            
-            # Parse XML to extract games
-            root = ET.fromstring(xml_content)
-            assert root.tag.lower() == "session", "Expected <session> root element"
+            # Stream the XML file: each <session>/<game> is serialized and hashed
+            # when its end tag is parsed, then cleared (no full tree in memory)
+            rows = []
+            root_tag = None
+            depth = 0
+            for event, elem in ET.iterparse(test_file, events=("start", "end")):
+                if event == "start":
+                    if root_tag is None:
+                        root_tag = elem.tag
+                        assert root_tag.lower() == "session", "Expected <session> root element"
+                    depth += 1
+                    continue
+                
+                depth -= 1
+                if depth != 1 or elem.tag != "game":
+                    continue
+                
+                gamecode = elem.attrib.get("gamecode", "").strip()
+                assert gamecode, "Game missing gamecode attribute"
+                assert gamecode == unique_gamecode, f"Gamecode mismatch: expected {unique_gamecode}, got {gamecode}"
+                
+                # Serialize the game element straight to UTF-8 bytes (no XML
+                # declaration for utf-8): hashed as is, decoded once for raw_text
+                game_bytes = ET.tostring(elem, encoding="utf-8")
+                
+                # Create hash for deduplication
+                raw_text_hash = hashlib.sha256(game_bytes).hexdigest()
+                
+                rows.append((SYSTEM_USER_ID, gamecode, str(test_file), raw_text_hash, game_bytes.decode('utf-8')))
+                elem.clear()
             
-            games = root.findall("game")
-            assert len(games) > 0, "No <game> elements found"
+            assert len(rows) > 0, "No <game> elements found"
             
-            print(f"\n[Setup] Found {len(games)} game(s) in fixture")
+            print(f"\n[Setup] Found {len(rows)} game(s) in fixture")
             
             # Open connection
+            # The whole test runs in this one transaction (no intermediate
+            # commits): the rollback in finally reverts everything it wrote
             conn = get_db_conn()
             conn.autocommit = False
             
-            # Ensure test user exists
+            # Setup statements sent in one pipeline (no wait per statement)
             with conn.cursor() as cur:
-                cur.execute(
-                    """
-                    INSERT INTO users (id, username) 
-                    VALUES (%s, %s) 
-                    ON CONFLICT (id) DO NOTHING
-                    """,
-                    (SYSTEM_USER_ID, 'test_system_user')
-                )
-            
-            # Pre-test cleanup: Remove any existing test data for this gamecode
-            print(f"[Cleanup] Removing any existing test data for gamecode: {unique_gamecode}")
-            with conn.cursor() as cur:
-                # Delete from dependent tables first (due to foreign keys)
-                cur.execute(
-                    """
-                    DELETE FROM actions 
-                    WHERE hand_id IN (
-                        SELECT id FROM hands WHERE game_id = %s AND user_id = %s
-                    )
-                    """,
-                    (unique_gamecode, SYSTEM_USER_ID)
-                )
-                cur.execute(
-                    """
-                    DELETE FROM hand_results 
-                    WHERE hand_id IN (
-                        SELECT id FROM hands WHERE game_id = %s AND user_id = %s
-                    )
-                    """,
-                    (unique_gamecode, SYSTEM_USER_ID)
-                )
-                cur.execute(
-                    """
-                    DELETE FROM streets 
-                    WHERE hand_id IN (
-                        SELECT id FROM hands WHERE game_id = %s AND user_id = %s
-                    )
-                    """,
-                    (unique_gamecode, SYSTEM_USER_ID)
-                )
-                cur.execute(
-                    """
-                    DELETE FROM hand_players 
-                    WHERE hand_id IN (
-                        SELECT id FROM hands WHERE game_id = %s AND user_id = %s
+                with conn.pipeline():
+                    # Ensure test user exists
+                    cur.execute(
+                        """
+                        INSERT INTO users (id, username) 
+                        VALUES (%s, %s) 
+                        ON CONFLICT (id) DO NOTHING
+                        """,
+                        (SYSTEM_USER_ID, 'test_system_user')
                     )
-                    """,
-                    (unique_gamecode, SYSTEM_USER_ID)
-                )
-                cur.execute(
-                    """
-                    DELETE FROM hand_sizes 
-                    WHERE hand_id IN (
-                        SELECT id FROM hands WHERE game_id = %s AND user_id = %s
+                    
+                    # Pre-test cleanup: Remove any existing test data for this gamecode
+                    print(f"[Cleanup] Removing any existing test data for gamecode: {unique_gamecode}")
+                    # One DELETE: hand_players, streets, actions, hand_results and
+                    # hand_sizes reference hands(id) ON DELETE CASCADE
+                    cur.execute(
+                        """
+                        DELETE FROM hands 
+                        WHERE game_id = %s AND user_id = %s
+                        """,
+                        (unique_gamecode, SYSTEM_USER_ID)
                     )
-                    """,
-                    (unique_gamecode, SYSTEM_USER_ID)
-                )
-                # Finally delete from hands table
-                cur.execute(
-                    """
-                    DELETE FROM hands 
-                    WHERE game_id = %s AND user_id = %s
-                    """,
-                    (unique_gamecode, SYSTEM_USER_ID)
-                )
+                
+                # Leaving the pipeline synced it: rowcount is now the DELETE's
                 deleted_count = cur.rowcount
                 if deleted_count > 0:
                     print(f"  Removed {deleted_count} existing hand(s) from previous test run")
             
-            conn.commit()
-            
             # RAW import phase
             print(f"[Phase 1] RAW Import...")
             
-            for game in games:
-                gamecode = game.attrib.get("gamecode", "").strip()
-                assert gamecode, "Game missing gamecode attribute"
-                assert gamecode == unique_gamecode, f"Gamecode mismatch: expected {unique_gamecode}, got {gamecode}"
-                
-                # Convert game element to string for storage
-                game_xml = ET.tostring(game, encoding="unicode")
-                
-                # Create hash for deduplication
-                raw_text_hash = hashlib.sha256(game_xml.encode('utf-8')).hexdigest()
-                
-                # Insert into hands table
-                with conn.cursor() as cur:
-                    cur.execute(
-                        """
-                        INSERT INTO hands (user_id, game_id, source_file, raw_text_hash, raw_text)
-                        VALUES (%s, %s, %s, %s, %s)
-                        ON CONFLICT (user_id, game_id) DO NOTHING
-                        RETURNING id
-                        """,
-                        (SYSTEM_USER_ID, gamecode, str(test_file), raw_text_hash, game_xml),
-                    )
+            # Insert into hands table: executemany runs in pipeline mode (one
+            # network flush for all games) on this one cursor, and psycopg
+            # prepares the INSERT server-side once for the whole batch (parsed
+            # and planned once, not per game); returning=True keeps each
+            # RETURNING result, an empty one when ON CONFLICT skipped the row
+            with conn.cursor() as cur:
+                cur.executemany(
+                    """
+                    INSERT INTO hands (user_id, game_id, source_file, raw_text_hash, raw_text)
+                    VALUES (%s, %s, %s, %s, %s)
+                    ON CONFLICT (user_id, game_id) DO NOTHING
+                    RETURNING id
+                    """,
+                    rows,
+                    returning=True,
+                )
+                # One result set per game, walked with nextset()
+                # (Cursor.results() needs psycopg >= 3.3)
+                while True:
                     result = cur.fetchone()
-                    
                     if result:
-                        hand_id = result[0]
-                        imported_hand_ids.append(hand_id)
-                    else:
-                        # This should not happen since we cleaned up, but track it
-                        duplicate_count += 1
+                        imported_hand_ids.append(result[0])
+                    if not cur.nextset():
+                        break
             
-            # Commit raw import
-            conn.commit()
+            # Rows skipped by ON CONFLICT: should not happen since we cleaned up, but track it
+            duplicate_count = len(rows) - len(imported_hand_ids)
             
             # DIAGNOSTICS: If no hands imported, provide detailed error info
             if len(imported_hand_ids) == 0:
@@ -241,30 +215,18 @@ def test_per_file_import_pipeline():
             if parse_result["errors"]:
                 print(f"  Errors: {parse_result['errors']}")
             
-            # Commit parsing results
-            conn.commit()
-            
             # ASSERTION 2: After parsing, rows exist in hand_players and actions
+            # (both counts in one statement)
             with conn.cursor() as cur:
                 cur.execute(
                     """
-                    SELECT COUNT(*) 
-                    FROM hand_players 
-                    WHERE hand_id = ANY(%s)
-                    """,
-                    (imported_hand_ids,)
-                )
-                hand_players_count = cur.fetchone()[0]
-                
-                cur.execute(
-                    """
-                    SELECT COUNT(*) 
-                    FROM actions 
-                    WHERE hand_id = ANY(%s)
+                    SELECT
+                        (SELECT COUNT(*) FROM hand_players WHERE hand_id = ANY(%(ids)s)),
+                        (SELECT COUNT(*) FROM actions WHERE hand_id = ANY(%(ids)s))
                     """,
-                    (imported_hand_ids,)
+                    {"ids": imported_hand_ids}
                 )
-                actions_count = cur.fetchone()[0]
+                hand_players_count, actions_count = cur.fetchone()
             
             assert hand_players_count > 0, "No hand_players entries found after parsing"
             assert actions_count > 0, "No actions entries found after parsing"